@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Compare the end-to-end latency of computing a ledger with the serial and the pipelined event reader.
+
+Run from the repository root: `python -m benchmarks.bench_balances [--events N] [--repeat R]`.
+"""
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+
+from tools.ledger import compute_ledger
+from tools.pipeline import iter_events
+
+
+def generate_rows(count: int) -> list[tuple[str, str, str]]:
+    """Return `count` random `(type, amount, date_created)` rows, one or more per day, in date order."""
+    rng = random.Random(42)
+    day = datetime.date(2000, 1, 1)
+    rows = []
+    for _ in range(count):
+        day += datetime.timedelta(days=rng.choice((0, 0, 1)))
+        event_type = "advance" if rng.random() < 0.5 else "payment"
+        rows.append((event_type, f"{rng.uniform(10, 5000):.2f}", day.isoformat()))
+    return rows
+
+
+def create_events_db(path: str, count: int) -> datetime.date:
+    """Fill a database with `count` random events and return the last date."""
+    rows = generate_rows(count)
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            """
+            create table events
+            (
+                id integer not null primary key autoincrement,
+                type varchar(32) not null,
+                amount decimal not null,
+                date_created date not null
+            );
+            """
+        )
+        connection.executemany(
+            "insert into events (type, amount, date_created) values (?, ?, ?)", rows
+        )
+    connection.close()
+    return datetime.date.fromisoformat(rows[-1][-1])
+
+
+def serial(path: str, last_date: datetime.date) -> None:
+    with closing(sqlite3.connect(path)) as connection:
+        events = connection.execute(
+            "select * from events order by date_created asc;"
+        ).fetchall()
+    compute_ledger(events, last_date)
+
+
+def pipelined(path: str, last_date: datetime.date) -> None:
+    with closing(iter_events(path)) as events:
+        compute_ledger(events, last_date)
+
+
+def best_of(function, repeat: int, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--events", type=int, default=200000)
+    arguments.add_argument("--repeat", type=int, default=5)
+    options = arguments.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "db.sqlite3")
+        last_date = create_events_db(path, options.events)
+        serial_time = best_of(serial, options.repeat, path, last_date)
+        pipelined_time = best_of(pipelined, options.repeat, path, last_date)
+    print(f"events:    {options.events}")
+    print(f"serial:    {serial_time:.3f}s")
+    print(f"pipelined: {pipelined_time:.3f}s ({serial_time / pipelined_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Compare one `compute_ledger` replay per rate with the single-pass `compute_sensitivity`.
+
+Run from the repository root: `python -m benchmarks.bench_sensitivity [--events N] [--rates R]`.
+"""
+import argparse
+import datetime
+import time
+from decimal import Decimal
+
+from benchmarks.bench_balances import generate_rows
+from tools.ledger import compute_ledger
+from tools.sensitivity import compute_sensitivity
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--events", type=int, default=5000)
+    arguments.add_argument("--rates", type=int, default=100)
+    options = arguments.parse_args()
+    events = [
+        (ix, row[0], float(row[1]), row[2])
+        for ix, row in enumerate(generate_rows(options.events), start=1)
+    ]
+    last_date = datetime.date.fromisoformat(events[-1][-1])
+    rates = [Decimal(ix) / Decimal(100000) for ix in range(options.rates)]
+
+    start = time.perf_counter()
+    replays = [compute_ledger(events, last_date, rate) for rate in rates]
+    replay_time = time.perf_counter() - start
+    start = time.perf_counter()
+    single_pass = compute_sensitivity(events, last_date, rates)
+    single_pass_time = time.perf_counter() - start
+    assert replays == single_pass
+
+    print(f"events:      {options.events}")
+    print(f"rates:       {options.rates}")
+    print(f"replays:     {replay_time:.3f}s")
+    print(
+        f"single pass: {single_pass_time:.3f}s ({replay_time / single_pass_time:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Measure the cost of the trace hooks on the replay loop.
+
+The events are parsed once up front and `apply_events` gets them as they are, so the timings cover the per-event loop
+only (parsing with dateutil would otherwise dominate and hide the hooks). Compares a copy of the loop calling the
+undecorated ledger functions (the code before the hooks existed) with `apply_events` and no tracer, a tracer whose
+filters reject everything, and a JSONL tracer writing every record.
+
+Run from the repository root: `python -m benchmarks.bench_tracing [--events N] [--repeat R]`.
+"""
+import argparse
+import datetime
+import os
+from decimal import Decimal
+from unittest import mock
+
+import tools.ledger
+from benchmarks.bench_balances import best_of, generate_rows
+from tools.ledger import DEFAULT_INTEREST_RATE, _parse_event_tuple, apply_events
+from tools.schemas import Event, Ledger
+from tools.tracing import JsonlTracer, tracing
+
+update_interest = tools.ledger._update_interest.__wrapped__
+perform_advance = tools.ledger._perform_advance.__wrapped__
+perform_payment = tools.ledger._perform_payment.__wrapped__
+
+
+def _empty_ledger() -> Ledger:
+    return Ledger([], [], None, Decimal(0), Decimal(0), Decimal(0))
+
+
+def without_hooks(events: list[Event], last_date: datetime.date) -> None:
+    ledger = _empty_ledger()
+    for event in events:
+        # The same pass-through parsing as `apply_events`, so only the hooks differ.
+        event = tools.ledger._parse_event_tuple(event)
+        if event.date_created > last_date:
+            break
+        ledger = update_interest(
+            ledger, event.date_created, DEFAULT_INTEREST_RATE, event=event
+        )
+        if event.event_type == "advance":
+            ledger = perform_advance(ledger, event)
+        else:
+            ledger = perform_payment(ledger, event.amount, event=event)
+
+
+def hooked(events: list[Event], last_date: datetime.date) -> None:
+    apply_events(_empty_ledger(), events, last_date)
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--events", type=int, default=50000)
+    arguments.add_argument("--repeat", type=int, default=7)
+    options = arguments.parse_args()
+    events = [
+        _parse_event_tuple((ix, row[0], float(row[1]), row[2]))
+        for ix, row in enumerate(generate_rows(options.events), start=1)
+    ]
+    last_date = events[-1].date_created
+
+    # `apply_events` receives the parsed events, so parsing becomes a pass-through.
+    with mock.patch.object(tools.ledger, "_parse_event_tuple", lambda event: event):
+        # Warm up both loops, so neither pays for the first allocations.
+        without_hooks(events, last_date)
+        hooked(events, last_date)
+        baseline = best_of(without_hooks, options.repeat, events, last_date)
+        no_tracer = best_of(hooked, options.repeat, events, last_date)
+        with open(os.devnull, "w") as devnull:
+            rejecting = JsonlTracer(devnull, end=datetime.date(1900, 1, 1))
+            with tracing(rejecting):
+                filtered = best_of(hooked, options.repeat, events, last_date)
+            with tracing(JsonlTracer(devnull)):
+                full = best_of(hooked, options.repeat, events, last_date)
+
+    print(f"events:             {options.events}")
+    print(f"without hooks:      {baseline:.3f}s")
+    print(f"no tracer:          {no_tracer:.3f}s ({no_tracer / baseline - 1:+.1%})")
+    print(f"filtered out:       {filtered:.3f}s ({filtered / baseline - 1:+.1%})")
+    print(f"jsonl, every event: {full:.3f}s ({full / baseline - 1:+.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,328 @@
 #!/usr/bin/env python3
 import click
 import csv
-from datetime import datetime
-from decimal import Decimal
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from contextlib import closing
+from functools import partial
 import os
 import sqlite3
-from typing import Dict
+import time
+from typing import Dict, Optional
 
 from dateutil import parser
 
+from tools.batch import (
+    RESULT_FIELDS,
+    _connect_read_only,
+    find_databases,
+    iter_balances,
+)
+from tools.ingest import external_sort, insert_event_rows
+from tools.journal import (
+    compute_statement,
+    create_journal,
+    has_journal,
+    rebuild_journal,
+)
 from tools.ledger import (
     compute_ledger,
     format_remaining_balances,
 )
+from tools.partitions import (
+    PARTITION_SCHEMES,
+    compute_partitioned_ledger,
+    create_catalog,
+    get_scheme,
+    insert_events,
+    partition_files,
+)
+from tools.pipeline import iter_events
+from tools.projection import project as compute_projection
+from tools.schemas import Ledger
+from tools.sensitivity import compute_sensitivity
+from tools.tracing import JsonlTracer, register_tracer, unregister_tracer
+from tools.watch import ingest_batch, ledger_as_of, open_watch
+
+
+MEMORY_DB = ":memory:"
+EVENTS_SCHEMA = """
+    create table events
+    (
+        id integer not null primary key autoincrement,
+        type varchar(32) not null,
+        amount decimal not null,
+        date_created date not null
+        CHECK (type IN ("advance", "payment"))
+    );
+"""
+# Stored in replay order, so `order by date_created` is a plain scan of the table.
+CLUSTERED_EVENTS_SCHEMA = """
+    create table events
+    (
+        id integer not null,
+        type varchar(32) not null,
+        amount decimal not null,
+        date_created date not null
+        CHECK (type IN ("advance", "payment")),
+        primary key (date_created, id)
+    ) without rowid;
+"""
 
 
 @click.group()
 @click.option(
     "--debug/--no-debug", default=False, help="Debug output, or no debug output."
 )
+@click.option(
+    "--db",
+    "db_path",
+    envvar="LEDGER_DB",
+    default=None,
+    help=f"Path of the sqlite3 database, or {MEMORY_DB} to keep it in RAM for this run. Defaults to db.sqlite3 in "
+    "the current directory.",
+)
+@click.option(
+    "--restore",
+    type=click.Path(exists=True, dir_okay=False, readable=True),
+    default=None,
+    help=f"Start the {MEMORY_DB} database as a copy of this database file.",
+)
+@click.option(
+    "--events",
+    "events_files",
+    type=click.Path(exists=True, dir_okay=False, readable=True),
+    multiple=True,
+    help=f"Load this csv file into the {MEMORY_DB} database before running the command.",
+)
+@click.option(
+    "--pipeline/--no-pipeline",
+    default=False,
+    help="Read the events in a background thread while the ledger is computed.",
+)
+@click.option(
+    "--history/--no-history",
+    default=True,
+    help="List every advance in `balances`, or only the outstanding ones (the repaid advances are then only counted).",
+)
+@click.option(
+    "--trace",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write a JSONL record of every ledger operation to this file.",
+)
+@click.option(
+    "--trace-start", type=click.STRING, default=None, help="First date to trace."
+)
+@click.option(
+    "--trace-end", type=click.STRING, default=None, help="Last date to trace."
+)
+@click.option(
+    "--trace-event",
+    "trace_events",
+    type=click.INT,
+    multiple=True,
+    help="Only trace this event identifier (repeatable).",
+)
+@click.option(
+    "--trace-sample",
+    type=click.FloatRange(min=0, max=1),
+    default=1.0,
+    help="Fraction of the events to trace.",
+)
+@click.option(
+    "--snapshot",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Back up the database to this file once the command is done.",
+)
 @click.pass_context
-def interface(ctx: Dict, debug: bool) -> None:
+def interface(
+    ctx: Dict,
+    debug: bool,
+    db_path: str,
+    restore: str,
+    events_files: tuple[str, ...],
+    pipeline: bool,
+    history: bool,
+    trace: str,
+    trace_start: str,
+    trace_end: str,
+    trace_events: tuple[int, ...],
+    trace_sample: float,
+    snapshot: str,
+) -> None:
     """Ampla engineering takehome ledger calculator."""
     ctx.ensure_object(dict)
     ctx.obj[
         "DEBUG"
     ] = debug  # you can use ctx.obj['DEBUG'] in other commands to log or print if DEBUG is on
-    ctx.obj["DB_PATH"] = os.path.join(os.getcwd(), "db.sqlite3")
+    ctx.obj["PIPELINE"] = pipeline
+    ctx.obj["HISTORY"] = history
+    ctx.obj["TRACE"] = trace
+    if db_path != MEMORY_DB and (restore or events_files):
+        raise click.UsageError(f"--restore and --events require --db {MEMORY_DB}")
+    if db_path == MEMORY_DB:
+        # The command uses this connection, the database goes away with it (unless a snapshot is taken).
+        connection = sqlite3.connect(MEMORY_DB)
+        if restore:
+            with sqlite3.connect(restore) as source:
+                source.backup(connection)
+            source.close()
+            if get_scheme(connection) is not None:
+                # The partitions are separate files, which an in-memory database can not own.
+                connection.close()
+                raise click.UsageError(
+                    f"Partitioned databases can not be restored into --db {MEMORY_DB}"
+                )
+        else:
+            # `create-db` can still replace it (see `_is_default_memory_db`).
+            connection.execute(EVENTS_SCHEMA)
+        for filename in events_files:
+            _insert_csv(connection, MEMORY_DB, filename)
+        ctx.obj["DB_PATH"] = MEMORY_DB
+        ctx.obj["CONNECTION"] = connection
+        ctx.obj["DEFAULT_SCHEMA"] = not restore
+    else:
+        ctx.obj["DB_PATH"] = os.path.abspath(
+            db_path or os.path.join(os.getcwd(), "db.sqlite3")
+        )
+    ctx.call_on_close(partial(_close_db, ctx.obj, snapshot))
+    if trace:
+        tracer = JsonlTracer(
+            open(trace, "w"),
+            start=None if trace_start is None else parser.parse(trace_start).date(),
+            end=None if trace_end is None else parser.parse(trace_end).date(),
+            event_ids=trace_events or None,
+            sample_rate=trace_sample,
+        )
+        register_tracer(tracer)
+        ctx.call_on_close(partial(_close_tracer, tracer))
     if debug:
         click.echo(f"[Debug mode is on]")
 
 
+def _connect(ctx: Dict) -> sqlite3.Connection:
+    """Return the in-memory connection, or a new connection to the database file."""
+    if "CONNECTION" in ctx.obj:
+        return ctx.obj["CONNECTION"]
+    return sqlite3.connect(ctx.obj["DB_PATH"])
+
+
+def _db_exists(ctx: Dict) -> bool:
+    """Check whether the database was created."""
+    if "CONNECTION" in ctx.obj:
+        tables = ctx.obj["CONNECTION"].execute("select count(*) from sqlite_master;")
+        return tables.fetchone()[0] > 0
+    return os.path.exists(ctx.obj["DB_PATH"])
+
+
+def _is_default_memory_db(ctx: Dict) -> bool:
+    """Check whether the database is the in-memory default events table, with no event loaded yet."""
+    if not ctx.obj.get("DEFAULT_SCHEMA"):
+        return False
+    events = ctx.obj["CONNECTION"].execute("select 1 from events limit 1;")
+    return events.fetchone() is None
+
+
+def _close_db(obj: Dict, snapshot: str = None) -> None:
+    """Back up the database to `snapshot` (if given) with the sqlite3 backup API, then release it."""
+    connection = obj.pop("CONNECTION", None)
+    if snapshot is not None:
+        if connection is None and not os.path.exists(obj["DB_PATH"]):
+            # The command dropped (or never created) it, and connecting would create an empty file.
+            click.echo(
+                f"Database does not exist at {obj['DB_PATH']}, no snapshot saved"
+            )
+            return
+        source = connection or _connect_read_only(obj["DB_PATH"])
+        if get_scheme(source) is not None:
+            click.echo("Snapshots are not available for partitioned databases")
+        else:
+            with sqlite3.connect(snapshot) as target:
+                source.backup(target)
+            target.close()
+            click.echo(f"Saved snapshot of {obj['DB_PATH']} at {snapshot}")
+        if connection is None:
+            source.close()
+    if connection is not None:
+        connection.close()
+
+
+def _close_tracer(tracer: JsonlTracer) -> None:
+    """Stop tracing and close the trace file."""
+    unregister_tracer(tracer)
+    tracer.close()
+
+
+def _insert_csv(
+    connection: sqlite3.Connection,
+    db_path: str,
+    filename: str,
+    sort_buffer: Optional[int] = None,
+) -> int:
+    """Insert the events of a csv file and return how many were loaded.
+
+    With `sort_buffer`, the rows are inserted in date order, sorted holding at most that many rows in memory.
+    """
+    with open(filename) as infile, connection:
+        if sort_buffer is None:
+            reader = csv.reader(infile)
+        else:
+            reader = external_sort(filename, sort_buffer)
+        if get_scheme(connection) is not None:
+            return insert_events(
+                connection,
+                db_path,
+                ((row[0], row[2], row[1]) for row in reader),
+                presorted=sort_buffer is not None,
+            )
+        loaded = insert_event_rows(
+            connection, ((row[0], row[2], row[1]) for row in reader)
+        )
+        if has_journal(connection):
+            rebuild_journal(connection)
+        connection.commit()
+    return loaded
+
+
 @interface.command()
+@click.option(
+    "--journal/--no-journal",
+    default=False,
+    help="Also keep a per-event journal, used by `statement`.",
+)
+@click.option(
+    "--partition",
+    type=click.Choice(sorted(PARTITION_SCHEMES)),
+    default=None,
+    help="Store the events in one sqlite3 file per period.",
+)
+@click.option(
+    "--clustered/--no-clustered",
+    default=False,
+    help="Keep the events table ordered by date (a WITHOUT ROWID table), so replays need no sort.",
+)
 @click.pass_context
-def create_db(ctx: Dict) -> None:
+def create_db(
+    ctx: Dict, journal: bool, partition: str = None, clustered: bool = False
+) -> None:
     """Initialize sqlite3 database."""
-    if os.path.exists(ctx.obj["DB_PATH"]):
+    if partition and "CONNECTION" in ctx.obj:
+        raise click.UsageError(f"--partition is not available with --db {MEMORY_DB}")
+    replace_default = _is_default_memory_db(ctx)
+    if _db_exists(ctx) and not replace_default:
         click.echo("Database already exists")
         return
+    if journal and partition:
+        click.echo("The journal is not available for partitioned databases")
+        return
+    if clustered and partition:
+        click.echo("Partitioned databases can not be clustered")
+        return
 
-    with sqlite3.connect(ctx.obj["DB_PATH"]) as connection:
+    with _connect(ctx) as connection:
         if not connection:
             click.echo(
                 "Error: Unable to create sqlite3 db file. Please ensure sqlite3 is installed on your system and "
@@ -47,19 +330,19 @@ def create_db(ctx: Dict) -> None:
             )
             return
 
+        if replace_default:
+            connection.execute("drop table events;")
+            ctx.obj["DEFAULT_SCHEMA"] = False
+        if partition:
+            create_catalog(connection, partition)
+            connection.commit()
+            click.echo(f"Initialized database at {ctx.obj['DB_PATH']}")
+            return
+
         cursor = connection.cursor()
-        cursor.execute(
-            """
-            create table events
-            (
-                id integer not null primary key autoincrement,
-                type varchar(32) not null,
-                amount decimal not null,
-                date_created date not null
-                CHECK (type IN ("advance", "payment"))
-            );
-        """
-        )
+        cursor.execute(CLUSTERED_EVENTS_SCHEMA if clustered else EVENTS_SCHEMA)
+        if journal:
+            create_journal(connection)
         connection.commit()
     click.echo(f"Initialized database at {ctx.obj['DB_PATH']}")
 
@@ -68,39 +351,80 @@ def create_db(ctx: Dict) -> None:
 @click.pass_context
 def drop_db(ctx: Dict) -> None:
     """Delete sqlite3 database."""
-    if not os.path.exists(ctx.obj["DB_PATH"]):
+    if not _db_exists(ctx):
         click.echo(f"SQLite database does not exist at {ctx.obj['DB_PATH']}")
+    elif "CONNECTION" in ctx.obj:
+        ctx.obj["CONNECTION"].close()
+        ctx.obj["CONNECTION"] = sqlite3.connect(MEMORY_DB)
+        ctx.obj["DEFAULT_SCHEMA"] = False
+        click.echo(f"Deleted SQLite database at {ctx.obj['DB_PATH']}")
     else:
+        with _connect(ctx) as connection:
+            if get_scheme(connection) is not None:
+                for path in partition_files(connection, ctx.obj["DB_PATH"]):
+                    if os.path.exists(path):
+                        os.unlink(path)
+        connection.close()
         os.unlink(ctx.obj["DB_PATH"])
         click.echo(f"Deleted SQLite database at {ctx.obj['DB_PATH']}")
 
 
 @interface.command()
 @click.argument("filename", type=click.Path(exists=True, writable=False, readable=True))
+@click.option(
+    "--sort/--no-sort",
+    default=False,
+    help="Insert the events in date order, sorting the file on temporary disk.",
+)
+@click.option(
+    "--sort-buffer",
+    type=click.IntRange(min=1),
+    default=100000,
+    show_default=True,
+    help="Maximum rows held in memory while sorting.",
+)
 @click.pass_context
-def load(ctx: Dict, filename: str) -> None:
+def load(ctx: Dict, filename: str, sort: bool, sort_buffer: int) -> None:
     """Load events with data from csv file."""
-    if not os.path.exists(ctx.obj["DB_PATH"]):
+    if not _db_exists(ctx):
         click.echo(
             f"Database does not exist at {ctx.obj['DB_PATH']}, please create it using `create-db` command"
         )
         return
 
-    loaded = 0
-    with open(filename) as infile, sqlite3.connect(ctx.obj["DB_PATH"]) as connection:
-        cursor = connection.cursor()
-        reader = csv.reader(infile)
-        for row in reader:
-            cursor.execute(
-                f"insert into events (type, amount, date_created) values (?, ?, ?)",
-                (row[0], row[2], row[1]),
-            )
-            loaded += 1
-        connection.commit()
-
+    loaded = _insert_csv(
+        _connect(ctx), ctx.obj["DB_PATH"], filename, sort_buffer if sort else None
+    )
     click.echo(f"Loaded {loaded} events from {filename}")
 
 
+def _load_ledger(
+    ctx: Dict, last_date: date, keep_history: bool = False
+) -> Optional[Ledger]:
+    """Compute the ledger of the stored events as of `last_date`, or None if there are no events."""
+    # query events from database example
+    with _connect(ctx) as connection:
+        if get_scheme(connection) is not None:
+            # Archived partitions are skipped, their summary is the starting state.
+            return compute_partitioned_ledger(
+                connection, ctx.obj["DB_PATH"], last_date, keep_history=keep_history
+            )
+        if ctx.obj["PIPELINE"] and "CONNECTION" not in ctx.obj:
+            if connection.execute("select 1 from events limit 1;").fetchone() is None:
+                return None
+            # A reader thread fetches the next blocks while the ledger is computed.
+            with closing(iter_events(ctx.obj["DB_PATH"])) as events:
+                return compute_ledger(
+                    events, last_date=last_date, keep_history=keep_history
+                )
+        cursor = connection.cursor()
+        result = cursor.execute("select * from events order by date_created asc;")
+        events = result.fetchall()
+    if not events:
+        return None
+    return compute_ledger(events, last_date=last_date, keep_history=keep_history)
+
+
 @interface.command()
 @click.argument("end_date", required=False, type=click.STRING)
 @click.pass_context
@@ -113,22 +437,11 @@ def balances(ctx: Dict, end_date: str = None) -> None:
     if end_date is None:
         end_date = datetime.now().date().isoformat()
 
-    overall_advance_balance = Decimal(0)
-    overall_interest_payable_balance = Decimal(0)
-    overall_interest_paid = Decimal(0)
-    overall_payments_for_future = Decimal(0)
-
-    # query events from database example
-    with sqlite3.connect(ctx.obj["DB_PATH"]) as connection:
-        cursor = connection.cursor()
-        result = cursor.execute("select * from events order by date_created asc;")
-        events = result.fetchall()
-    if not events:
+    advances = _load_ledger(ctx, parser.parse(end_date).date(), ctx.obj["HISTORY"])
+    if advances is None:
         click.echo("No events found")
         return
 
-    advances = compute_ledger(events, last_date=parser.parse(end_date).date())
-
     click.echo("Advances:")
     click.echo("----------------------------------------------------------")
     # NOTE: This initial print adheres to the format spec.
@@ -137,19 +450,40 @@ def balances(ctx: Dict, end_date: str = None) -> None:
             "Identifier", "Date", "Initial Amt", "Current Balance"
         )
     )
-    balances = format_remaining_balances(advances.advances, advances.total_balance)
+    # The repaid advances are only listed from the archive, their balance is 0.
+    for ix, (advance_date, initial_amt) in enumerate(advances.archive or []):
+        click.echo(
+            "{0:>10}{1:>11}{2:>17.2f}{3:>20.2f}".format(
+                ix + 1,  # The advance identifier is 1-based
+                advance_date.isoformat(),
+                initial_amt,
+                Decimal(0),
+            )
+        )
+    balances = format_remaining_balances(
+        advances.advances, advances.total_balance, advances.advances_total
+    )
     for ix, _ in enumerate(balances):
         advance_date = advances.advance_dates[ix].isoformat()
         initial_amt = advances.advances[ix]
         current_balance = balances[ix]
         click.echo(
             "{0:>10}{1:>11}{2:>17.2f}{3:>20.2f}".format(
-                ix + 1,  # The advance identifier is 1-based
+                advances.repaid_advances + ix + 1,  # The advance identifier is 1-based
                 advance_date,
                 initial_amt,
                 current_balance,
             )
         )
+
+    # print summary statistics
+    click.echo()
+    for line in _summary_lines(advances):
+        click.echo(line)
+
+
+def _summary_lines(advances: Ledger) -> list[str]:
+    """Format the summary statistics of a ledger."""
     overall_advance_balance = (
         advances.total_balance if advances.total_balance >= Decimal(0) else 0
     )
@@ -158,23 +492,387 @@ def balances(ctx: Dict, end_date: str = None) -> None:
     overall_payments_for_future = (
         abs(advances.total_balance) if advances.total_balance <= Decimal(0) else 0
     )
+    # NOTE: These lines adhere to the format spec.
+    return [
+        "Summary Statistics:",
+        "----------------------------------------------------------",
+        "Aggregate Advance Balance: {0:31.2f}".format(overall_advance_balance),
+        "Interest Payable Balance: {0:32.2f}".format(overall_interest_payable_balance),
+        "Total Interest Paid: {0:37.2f}".format(overall_interest_paid),
+        "Balance Applicable to Future Advances: {0:>19.2f}".format(
+            overall_payments_for_future
+        ),
+    ]
 
-    # TODO: FIXME Print each advance row and relevant advance statistics
 
-    # print summary statistics
-    # NOTE: These prints adhere to the format spec.
-    click.echo("\nSummary Statistics:")
+@interface.command()
+@click.argument("start_date", type=click.STRING)
+@click.argument("end_date", type=click.STRING)
+@click.pass_context
+def statement(ctx: Dict, start_date: str, end_date: str) -> None:
+    """Display the ledger activity between `start_date` and `end_date` (inclusive)."""
+    start = parser.parse(start_date).date()
+    end = parser.parse(end_date).date()
+    if start > end:
+        click.echo("The start date must not be after the end date")
+        return
+    if not _db_exists(ctx):
+        click.echo(
+            f"Database does not exist at {ctx.obj['DB_PATH']}, please create it using `create-db` command"
+        )
+        return
+
+    with _connect(ctx) as connection:
+        if not has_journal(connection):
+            click.echo(
+                "No journal found, please create the database using `create-db --journal`"
+            )
+            return
+        period = compute_statement(connection, start, end)
+
+    click.echo(f"Statement {start.isoformat()} to {end.isoformat()}:")
     click.echo("----------------------------------------------------------")
-    click.echo("Aggregate Advance Balance: {0:31.2f}".format(overall_advance_balance))
     click.echo(
-        "Interest Payable Balance: {0:32.2f}".format(overall_interest_payable_balance)
+        "{0:>11}{1:>9}{2:>13}{3:>13}{4:>13}".format(
+            "Date", "Type", "Amount", "Interest", "Principal"
+        )
     )
-    click.echo("Total Interest Paid: {0:37.2f}".format(overall_interest_paid))
+    for entry in period.entries:
+        click.echo(
+            "{0:>11}{1:>9}{2:>13.2f}{3:>13.2f}{4:>13.2f}".format(
+                entry.date_created.isoformat(),
+                entry.event_type,
+                entry.amount,
+                entry.interest_paid,
+                entry.principal_paid,
+            )
+        )
+
+    click.echo("\nPeriod Statistics:")
+    click.echo("----------------------------------------------------------")
+    click.echo("Opening Balance: {0:41.2f}".format(period.opening_balance))
     click.echo(
-        "Balance Applicable to Future Advances: {0:>19.2f}".format(
-            overall_payments_for_future
+        "Opening Interest Payable: {0:32.2f}".format(period.opening_accrued_interest)
+    )
+    click.echo("Interest Accrued: {0:40.2f}".format(period.interest_accrued))
+    click.echo("Interest Paid: {0:43.2f}".format(period.interest_paid))
+    click.echo("Principal Paid: {0:42.2f}".format(period.principal_paid))
+    click.echo("Closing Balance: {0:41.2f}".format(period.closing_balance))
+    click.echo(
+        "Closing Interest Payable: {0:32.2f}".format(period.closing_accrued_interest)
+    )
+
+
+@interface.command()
+@click.argument("filename", type=click.Path(exists=True, writable=False, readable=True))
+@click.option(
+    "--end-date",
+    type=click.STRING,
+    default=None,
+    help="Compute the summary as of this date. Defaults to today.",
+)
+@click.option(
+    "--interval",
+    type=click.FLOAT,
+    default=0.25,
+    show_default=True,
+    help="Seconds between checks for new rows.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=1000,
+    show_default=True,
+    help="Maximum rows per transaction.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+    help="Write the summary to this file instead of printing it.",
+)
+@click.option(
+    "--once", is_flag=True, default=False, help="Ingest the pending rows and exit."
+)
+@click.pass_context
+def watch(
+    ctx: Dict,
+    filename: str,
+    end_date: str,
+    interval: float,
+    batch_size: int,
+    output: str,
+    once: bool,
+) -> None:
+    """Ingest rows appended to a csv file and keep the summary statistics up to date."""
+    if not _db_exists(ctx):
+        click.echo(
+            f"Database does not exist at {ctx.obj['DB_PATH']}, please create it using `create-db` command"
+        )
+        return
+
+    with _connect(ctx) as connection:
+        if get_scheme(connection) is not None:
+            click.echo("Watching is not available for partitioned databases")
+            return
+        state = open_watch(connection, filename)
+        try:
+            while True:
+                if os.path.getsize(state.filename) < state.offset:
+                    click.echo(f"{filename} was truncated, stopping")
+                    return
+                offset = state.offset
+                rejected = []
+                ingested = ingest_batch(
+                    connection, state, max_rows=batch_size, rejected=rejected
+                )
+                for line in rejected:
+                    click.echo(
+                        f"Skipped the line at byte {line.offset} of {filename} ({line.reason}): {line.text}"
+                    )
+                if ingested:
+                    last_date = (
+                        datetime.now().date()
+                        if end_date is None
+                        else parser.parse(end_date).date()
+                    )
+                    lines = _summary_lines(ledger_as_of(connection, state, last_date))
+                    if output is None:
+                        click.echo(f"Ingested {ingested} events from {filename}")
+                        for line in lines:
+                            click.echo(line)
+                    else:
+                        # Write to a temporary file first, so readers never see a partial summary.
+                        with open(f"{output}.tmp", "w") as outfile:
+                            outfile.write("\n".join(lines) + "\n")
+                        os.replace(f"{output}.tmp", output)
+                if state.offset > offset:
+                    # More rows may be pending past the batch size.
+                    continue
+                if once:
+                    return
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            return
+
+
+@interface.command()
+@click.argument("source", type=click.Path(exists=True, readable=True))
+@click.argument("end_date", required=False, type=click.STRING)
+@click.option(
+    "--pattern",
+    default="**/db.sqlite3",
+    show_default=True,
+    help="Glob pattern of the database files when SOURCE is a directory.",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["csv", "jsonl"]),
+    default="csv",
+    show_default=True,
+    help="Output format.",
+)
+@click.option(
+    "--output",
+    type=click.File("w"),
+    default="-",
+    help="Write the results to this file. Defaults to stdout.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Number of worker processes. Defaults to the number of CPUs.",
+)
+@click.pass_context
+def balances_many(
+    ctx: Dict,
+    source: str,
+    end_date: str,
+    pattern: str,
+    output_format: str,
+    output,
+    workers: int,
+) -> None:
+    """Compute the summary statistics of many databases, given as a directory or a manifest file of paths."""
+    if ctx.obj["TRACE"] is not None:
+        # The records could not be told apart, and the worker processes do not trace.
+        raise click.UsageError("--trace is not available with balances-many")
+    if end_date is None:
+        end_date = datetime.now().date().isoformat()
+    db_paths = find_databases(source, pattern)
+
+    writer = None
+    if output_format == "csv":
+        writer = csv.DictWriter(output, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+    errors = 0
+    for record in iter_balances(
+        db_paths, parser.parse(end_date).date(), workers=workers
+    ):
+        if record["status"] == "error":
+            errors += 1
+        if writer is None:
+            output.write(json.dumps(record) + "\n")
+        else:
+            writer.writerow(record)
+        output.flush()
+    click.echo(f"Computed {len(db_paths)} databases, {errors} failed", err=True)
+
+
+@interface.command()
+@click.argument("schedule", type=click.Path(exists=True, dir_okay=False, readable=True))
+@click.argument("end_date", type=click.STRING)
+@click.option(
+    "--as-of",
+    type=click.STRING,
+    default=None,
+    help="Start from the balances at the end of this date. Defaults to today.",
+)
+@click.option(
+    "--step",
+    type=click.IntRange(min=1),
+    default=30,
+    show_default=True,
+    help="Days between projected dates.",
+)
+@click.pass_context
+def project(ctx: Dict, schedule: str, end_date: str, as_of: str, step: int) -> None:
+    """Project balances up to `end_date` under a csv schedule of future events."""
+    start = datetime.now().date() if as_of is None else parser.parse(as_of).date()
+    end = parser.parse(end_date).date()
+    if end <= start:
+        click.echo(f"The end date must be after {start.isoformat()}")
+        return
+    if not _db_exists(ctx):
+        click.echo(
+            f"Database does not exist at {ctx.obj['DB_PATH']}, please create it using `create-db` command"
+        )
+        return
+    with open(schedule) as infile:
+        planned = [
+            (ix, row[0], row[2], row[1])
+            for ix, row in enumerate(csv.reader(infile), start=1)
+            if row
+        ]
+    if any(parser.parse(event[-1]).date() <= start for event in planned):
+        click.echo(f"Scheduled events must be after {start.isoformat()}")
+        return
+
+    advances = _load_ledger(ctx, start)
+    if advances is None:
+        advances = Ledger([], [], None, Decimal(0), Decimal(0), Decimal(0))
+    dates = [
+        start + timedelta(days=days)
+        for days in range(step, (end - start).days + 1, step)
+    ]
+    if not dates or dates[-1] != end:
+        dates.append(end)
+
+    click.echo(f"Projection from {start.isoformat()}:")
+    click.echo("----------------------------------------------------------")
+    click.echo(
+        "{0:>10}{1:>16}{2:>16}{3:>16}".format(
+            "Date", "Balance", "Int Payable", "Int Paid"
         )
     )
+    for point in compute_projection(advances, planned, dates):
+        click.echo(
+            "{0:>10}{1:>16.2f}{2:>16.2f}{3:>16.2f}".format(
+                point.date.isoformat(),
+                point.total_balance,
+                point.total_accrued_interest,
+                point.total_interest_paid,
+            )
+        )
+
+
+def _parse_rates(ctx: Dict, param: click.Parameter, value: tuple) -> tuple:
+    """Parse the interest rates of `--rate` or `--grid` into Decimals, rejecting anything that is not a number."""
+    if value is None:
+        return None
+    # The grid's COUNT is already an int.
+    texts = value[:2] if param.name == "grid" else value
+    try:
+        rates = tuple(Decimal(rate) for rate in texts)
+    except InvalidOperation:
+        rates = ()
+    if len(rates) != len(texts) or not all(rate.is_finite() for rate in rates):
+        raise click.BadParameter(f"the rates must be numbers, got {' '.join(texts)}")
+    return rates + value[len(texts) :]
+
+
+@interface.command()
+@click.argument("end_date", type=click.STRING)
+@click.option(
+    "--rate",
+    "rates",
+    type=click.STRING,
+    multiple=True,
+    callback=_parse_rates,
+    help="Daily interest rate to evaluate (repeatable).",
+)
+@click.option(
+    "--grid",
+    type=(click.STRING, click.STRING, click.IntRange(min=2)),
+    default=None,
+    callback=_parse_rates,
+    help="Evaluate COUNT evenly spaced daily rates from MIN to MAX.",
+    metavar="MIN MAX COUNT",
+)
+@click.pass_context
+def sensitivity(
+    ctx: Dict,
+    end_date: str,
+    rates: tuple[Decimal, ...],
+    grid: tuple[Decimal, Decimal, int],
+) -> None:
+    """Display the summary statistics as of `end_date` under several interest rates."""
+    interest_rates = list(rates)
+    if grid is not None:
+        low, high, count = grid
+        interest_rates += [low + (high - low) * ix / (count - 1) for ix in range(count)]
+    if not interest_rates:
+        click.echo("Please give the rates with `--rate` or `--grid`")
+        return
+    if not _db_exists(ctx):
+        click.echo(
+            f"Database does not exist at {ctx.obj['DB_PATH']}, please create it using `create-db` command"
+        )
+        return
+
+    with _connect(ctx) as connection:
+        if get_scheme(connection) is not None:
+            click.echo(
+                "Sensitivity analysis is not available for partitioned databases"
+            )
+            return
+        events = connection.execute(
+            "select * from events order by date_created asc;"
+        ).fetchall()
+    if not events:
+        click.echo("No events found")
+        return
+
+    ledgers = compute_sensitivity(events, parser.parse(end_date).date(), interest_rates)
+    click.echo("Rate Sensitivity:")
+    click.echo("----------------------------------------------------------")
+    click.echo(
+        "{0:>12}{1:>12}{2:>12}{3:>11}{4:>11}".format(
+            "Daily Rate", "Advance Bal", "Int Payable", "Int Paid", "Future"
+        )
+    )
+    for interest_rate, advances in zip(interest_rates, ledgers):
+        click.echo(
+            "{0:>12}{1:>12.2f}{2:>12.2f}{3:>11.2f}{4:>11.2f}".format(
+                f"{interest_rate:.6f}",
+                max(advances.total_balance, Decimal(0)),
+                advances.total_accrued_interest,
+                advances.total_interest_paid,
+                max(-advances.total_balance, Decimal(0)),
+            )
+        )
 
 
 if __name__ == "__main__":
@@ -156,6 +156,404 @@ class CLITest(unittest.TestCase):
                 with open(output_path, "r") as correct_f:
                     self.assertEqual(correct_f.read(), result.output)
 
+    def test_statement(self):
+        """Test `statement` requires a journal and reports the period activity."""
+        test_file = os.path.join(self.test_dir, "test1.csv")
+        with self.runner.isolated_filesystem(temp_dir="/tmp"):
+            result = self.runner.invoke(
+                interface, ["statement", "2021-05-01", "2021-05-25"]
+            )
+            self.assertEqual(
+                f"Database does not exist at {os.path.join(os.getcwd(), 'db.sqlite3')},"
+                f" please create it using `create-db` command\n",
+                result.output,
+            )
+            self.assertEqual([], os.listdir(os.getcwd()))
+            self.runner.invoke(interface, ["create-db"])
+            self.runner.invoke(interface, ["load", test_file])
+            result = self.runner.invoke(
+                interface, ["statement", "2021-05-01", "2021-05-25"]
+            )
+            self.assertEqual(0, result.exit_code)
+            self.assertEqual(
+                "No journal found, please create the database using `create-db --journal`\n",
+                result.output,
+            )
+            self.runner.invoke(interface, ["drop-db"])
+            self.runner.invoke(interface, ["create-db", "--journal"])
+            self.runner.invoke(interface, ["load", test_file])
+            result = self.runner.invoke(
+                interface, ["statement", "2021-05-01", "2021-05-25"]
+            )
+            self.assertEqual(0, result.exit_code)
+            self.assertIn(
+                " 2021-05-24  payment       500.00         0.70       499.30\n",
+                result.output,
+            )
+            self.assertIn(
+                "Interest Paid:                                        0.88\n",
+                result.output,
+            )
+
+    def test_in_memory_statement(self):
+        """Test `create-db --journal` replaces the default in-memory schema, so `statement` works in memory."""
+        test_file = os.path.join(self.test_dir, "test1.csv")
+        with self.runner.isolated_filesystem(temp_dir="/tmp"):
+            result = self.runner.invoke(
+                interface,
+                [
+                    "--db",
+                    ":memory:",
+                    "--snapshot",
+                    "journal.sqlite3",
+                    "create-db",
+                    "--journal",
+                ],
+            )
+            self.assertEqual(0, result.exit_code)
+            self.assertIn("Initialized database at :memory:\n", result.output)
+            result = self.runner.invoke(
+                interface,
+                [
+                    "--db",
+                    ":memory:",
+                    "--restore",
+                    "journal.sqlite3",
+                    "--events",
+                    test_file,
+                    "statement",
+                    "2021-05-01",
+                    "2021-05-25",
+                ],
+            )
+            self.assertEqual(0, result.exit_code)
+            self.assertIn(
+                " 2021-05-24  payment       500.00         0.70       499.30\n",
+                result.output,
+            )
+            result = self.runner.invoke(
+                interface, ["--db", ":memory:", "create-db", "--clustered"]
+            )
+            self.assertEqual("Initialized database at :memory:\n", result.output)
+            result = self.runner.invoke(
+                interface, ["--db", ":memory:", "--events", test_file, "create-db"]
+            )
+            self.assertEqual("Database already exists\n", result.output)
+
+    def test_in_memory_rejects_partitions(self):
+        """Test partitioned databases are rejected in memory, and a dropped database is not snapshotted."""
+        with self.runner.isolated_filesystem(temp_dir="/tmp"):
+            args = ["--db", ":memory:", "create-db", "--partition", "monthly"]
+            result = self.runner.invoke(interface, args)
+            self.assertEqual(2, result.exit_code)
+            self.assertIn(
+                "--partition is not available with --db :memory:", result.output
+            )
+            self.runner.invoke(interface, ["create-db", "--partition", "monthly"])
+            args = ["--db", ":memory:", "--restore", "db.sqlite3", "balances"]
+            result = self.runner.invoke(interface, args)
+            self.assertEqual(2, result.exit_code)
+            self.assertIn(
+                "Partitioned databases can not be restored into --db :memory:",
+                result.output,
+            )
+            result = self.runner.invoke(
+                interface, ["--snapshot", "snapshot.sqlite3", "drop-db"]
+            )
+            self.assertIn("no snapshot saved", result.output)
+            self.assertEqual([], os.listdir(os.getcwd()))
+
+    def test_partitioned_results(self):
+        """Test `balances` on a partitioned database against the correct output."""
+        for test_filename, output_date, output in TEST_INPUTS[-4:]:
+            with self.runner.isolated_filesystem(temp_dir="/tmp"), self.subTest(
+                test_filename=test_filename, output_date=output_date
+            ):
+                test_file_location = os.path.join(self.test_dir, test_filename)
+                self.runner.invoke(interface, ["create-db", "--partition", "monthly"])
+                self.runner.invoke(interface, ["load", test_file_location])
+                result = self.runner.invoke(interface, ["balances", output_date])
+                self.assertEqual(0, result.exit_code)
+                with open(os.path.join(self.test_dir, output), "r") as correct_f:
+                    self.assertEqual(correct_f.read(), result.output)
+                self.runner.invoke(interface, ["drop-db"])
+                self.assertEqual([], os.listdir(os.getcwd()))
+
+    def test_watch(self):
+        """Test `watch` only ingests rows appended since the previous run."""
+        with open(os.path.join(self.test_dir, "test1.csv")) as infile:
+            lines = infile.readlines()
+        with self.runner.isolated_filesystem(temp_dir="/tmp"):
+            self.runner.invoke(interface, ["create-db"])
+            with open("events.csv", "w") as outfile:
+                outfile.writelines(lines[:2])
+            args = ["watch", "events.csv", "--once", "--end-date", "2021-05-25"]
+            result = self.runner.invoke(interface, args)
+            self.assertEqual(0, result.exit_code)
+            self.assertIn("Ingested 2 events from events.csv\n", result.output)
+            with open("events.csv", "a") as outfile:
+                outfile.writelines(lines[2:])
+            result = self.runner.invoke(interface, args + ["--output", "summary.txt"])
+            self.assertEqual(0, result.exit_code)
+            with open(os.path.join(self.test_dir, "test1.correct.2021-05-25.txt")) as f:
+                expected = f.read().split("\n\n")[1]
+            with open("summary.txt") as f:
+                self.assertEqual(expected, f.read())
+            result = self.runner.invoke(interface, args)
+            self.assertEqual("", result.output)
+
+    def test_watch_skips_malformed_lines(self):
+        """Test `watch` reports malformed lines with their byte offset and still moves past them."""
+        with self.runner.isolated_filesystem(temp_dir="/tmp"):
+            self.runner.invoke(interface, ["create-db"])
+            with open("events.csv", "w") as outfile:
+                outfile.write("refund,2021-05-22,10\nadvance,2021-05-22,1000.00\n")
+            args = ["watch", "events.csv", "--once", "--end-date", "2021-05-25"]
+            result = self.runner.invoke(interface, args)
+            self.assertEqual(0, result.exit_code)
+            self.assertIn(
+                "Skipped the line at byte 0 of events.csv (unknown event type 'refund'): refund,2021-05-22,10\n",
+                result.output,
+            )
+            self.assertIn("Ingested 1 events from events.csv\n", result.output)
+            with open("events.csv", "a") as outfile:
+                outfile.write("payment,2021-05-24\n")
+            result = self.runner.invoke(interface, args)
+            self.assertEqual(0, result.exit_code)
+            self.assertEqual(
+                "Skipped the line at byte 48 of events.csv (expected 3 fields, got 2): payment,2021-05-24\n",
+                result.output,
+            )
+            self.assertEqual("", self.runner.invoke(interface, args).output)
+
+    def test_in_memory_db(self):
+        """Test an in-memory run loads, computes and snapshots without touching db.sqlite3."""
+        test_file = os.path.join(self.test_dir, "test7.csv")
+        with open(os.path.join(self.test_dir, "test7.correct.2022-01-11.txt")) as f:
+            expected = f.read()
+        with self.runner.isolated_filesystem(temp_dir="/tmp"):
+            result = self.runner.invoke(
+                interface,
+                ["--db", ":memory:", "--events", test_file, "balances", "2022-01-11"],
+            )
+            self.assertEqual(0, result.exit_code)
+            self.assertEqual(expected, result.output)
+            self.assertEqual([], os.listdir(os.getcwd()))
+
+            result = self.runner.invoke(
+                interface,
+                [
+                    "--db",
+                    ":memory:",
+                    "--snapshot",
+                    "snapshot.sqlite3",
+                    "load",
+                    test_file,
+                ],
+            )
+            self.assertEqual(0, result.exit_code)
+            self.assertEqual(["snapshot.sqlite3"], os.listdir(os.getcwd()))
+            result = self.runner.invoke(
+                interface,
+                ["balances", "2022-01-11"],
+                env={"LEDGER_DB": "snapshot.sqlite3"},
+            )
+            self.assertEqual(expected, result.output)
+
+            result = self.runner.invoke(
+                interface,
+                [
+                    "--db",
+                    ":memory:",
+                    "--restore",
+                    "snapshot.sqlite3",
+                    "load",
+                    test_file,
+                ],
+            )
+            self.assertEqual(f"Loaded 500 events from {test_file}\n", result.output)
+            result = self.runner.invoke(
+                interface, ["--db", "snapshot.sqlite3", "balances", "2022-01-11"]
+            )
+            self.assertEqual(expected, result.output)
+
+            result = self.runner.invoke(interface, ["--events", test_file, "balances"])
+            self.assertEqual(2, result.exit_code)
+
+    def test_sorted_load_into_clustered_db(self):
+        """Test `load --sort` into a clustered database against the correct output."""
+        for test_filename, output_date, output in TEST_INPUTS[-4:]:
+            with self.runner.isolated_filesystem(temp_dir="/tmp"), self.subTest(
+                test_filename=test_filename, output_date=output_date
+            ):
+                test_file_location = os.path.join(self.test_dir, test_filename)
+                self.runner.invoke(interface, ["create-db", "--clustered"])
+                result = self.runner.invoke(
+                    interface,
+                    ["load", "--sort", "--sort-buffer", "10", test_file_location],
+                )
+                self.assertEqual(0, result.exit_code)
+                result = self.runner.invoke(interface, ["balances", output_date])
+                with open(os.path.join(self.test_dir, output), "r") as correct_f:
+                    self.assertEqual(correct_f.read(), result.output)
+
+    def test_project(self):
+        """Test `project` adds no events and reports the scheduled payment."""
+        test_file = os.path.join(self.test_dir, "test1.csv")
+        with self.runner.isolated_filesystem(temp_dir="/tmp"):
+            with open("schedule.csv", "w") as outfile:
+                outfile.write("advance,2021-06-01,1000.00\n")
+            result = self.runner.invoke(
+                interface,
+                ["project", "schedule.csv", "2021-07-01", "--as-of", "2021-05-25"],
+            )
+            self.assertEqual(0, result.exit_code)
+            self.assertIn("Database does not exist", result.output)
+            self.assertEqual(["schedule.csv"], os.listdir(os.getcwd()))
+            self.runner.invoke(interface, ["create-db"])
+            self.runner.invoke(interface, ["load", test_file])
+            result = self.runner.invoke(
+                interface,
+                [
+                    "project",
+                    "schedule.csv",
+                    "2021-06-11",
+                    "--as-of",
+                    "2021-05-25",
+                    "--step",
+                    "6",
+                ],
+            )
+            self.assertEqual(0, result.exit_code)
+            self.assertIn(
+                "2021-05-31          -99.12            0.00            0.88\n",
+                result.output,
+            )
+            self.assertIn(
+                "2021-06-11          900.88            3.47            0.88\n",
+                result.output,
+            )
+            result = self.runner.invoke(interface, ["balances", "2021-06-11"])
+            with open(os.path.join(self.test_dir, "test1.correct.2021-05-25.txt")) as f:
+                self.assertEqual(f.read(), result.output)
+
+    def test_pipelined_results(self):
+        """Test `balances` with the pipelined reader against the correct output."""
+        for test_filename, output_date, output in TEST_INPUTS[-4:]:
+            with self.runner.isolated_filesystem(temp_dir="/tmp"), self.subTest(
+                test_filename=test_filename, output_date=output_date
+            ):
+                test_file_location = os.path.join(self.test_dir, test_filename)
+                self.runner.invoke(interface, ["create-db"])
+                self.runner.invoke(interface, ["load", test_file_location])
+                result = self.runner.invoke(
+                    interface, ["--pipeline", "balances", output_date]
+                )
+                self.assertEqual(0, result.exit_code)
+                with open(os.path.join(self.test_dir, output), "r") as correct_f:
+                    self.assertEqual(correct_f.read(), result.output)
+
+    def test_outstanding_results(self):
+        """Test `--no-history` lists only the outstanding advances, keeping their identifiers."""
+        for test_filename, output_date, output in TEST_INPUTS:
+            with self.runner.isolated_filesystem(temp_dir="/tmp"), self.subTest(
+                test_filename=test_filename, output_date=output_date
+            ):
+                test_file_location = os.path.join(self.test_dir, test_filename)
+                self.runner.invoke(interface, ["create-db"])
+                self.runner.invoke(interface, ["load", test_file_location])
+                result = self.runner.invoke(
+                    interface, ["--no-history", "balances", output_date]
+                )
+                self.assertEqual(0, result.exit_code)
+                with open(os.path.join(self.test_dir, output), "r") as correct_f:
+                    lines = correct_f.read().splitlines()
+                # The advance rows sit between the header and the blank line; repaid ones have a 0.00 balance.
+                blank = lines.index("")
+                expected = (
+                    lines[:3]
+                    + [line for line in lines[3:blank] if line.split()[-1] != "0.00"]
+                    + lines[blank:]
+                )
+                self.assertEqual(expected, result.output.splitlines())
+
+    def test_balances_many(self):
+        """Test `balances-many` computes every database of a directory and isolates the broken ones."""
+        with self.runner.isolated_filesystem(temp_dir="/tmp"):
+            for test_filename in ("test2.csv", "test4.csv"):
+                os.mkdir(basename(test_filename))
+                self.runner.invoke(
+                    interface,
+                    [
+                        "--db",
+                        os.path.join(basename(test_filename), "db.sqlite3"),
+                        "create-db",
+                    ],
+                )
+                self.runner.invoke(
+                    interface,
+                    [
+                        "--db",
+                        os.path.join(basename(test_filename), "db.sqlite3"),
+                        "load",
+                        os.path.join(self.test_dir, test_filename),
+                    ],
+                )
+            os.mkdir("broken")
+            with open(os.path.join("broken", "db.sqlite3"), "w") as outfile:
+                outfile.write("not a database")
+            result = self.runner.invoke(
+                interface, ["balances-many", ".", "2022-01-10", "--workers", "2"]
+            )
+            self.assertEqual(0, result.exit_code)
+            traced = self.runner.invoke(
+                interface, ["--trace", "t.jsonl", "balances-many", ".", "2022-01-10"]
+            )
+            self.assertEqual(2, traced.exit_code)
+            self.assertIn("--trace is not available with balances-many", traced.output)
+            self.assertEqual(
+                [
+                    "path,status,events,aggregate_advance_balance,interest_payable_balance,total_interest_paid,"
+                    "balance_applicable_to_future_advances,error",
+                    "broken/db.sqlite3,error,,,,,,DatabaseError: file is not a database",
+                    "test2/db.sqlite3,ok,5,757.79,42.44,57.79,0.00,",
+                    "test4/db.sqlite3,ok,18,0.00,0.00,3833.61,9666.39,",
+                    "Computed 3 databases, 1 failed",
+                ],
+                result.output.splitlines(),
+            )
+
+    def test_sensitivity(self):
+        """Test `sensitivity` prints one row per rate."""
+        test_file = os.path.join(self.test_dir, "test2.csv")
+        with self.runner.isolated_filesystem(temp_dir="/tmp"):
+            result = self.runner.invoke(
+                interface, ["sensitivity", "2021-10-01", "--rate", "0.001"]
+            )
+            self.assertEqual(0, result.exit_code)
+            self.assertIn("Database does not exist", result.output)
+            self.assertEqual([], os.listdir(os.getcwd()))
+            self.runner.invoke(interface, ["create-db"])
+            self.runner.invoke(interface, ["load", test_file])
+            for args in (["--rate", "abc"], ["--grid", "x", "0.001", "3"]):
+                result = self.runner.invoke(
+                    interface, ["sensitivity", "2021-10-01"] + args
+                )
+                self.assertEqual(2, result.exit_code)
+                self.assertIn("the rates must be numbers", result.output)
+            result = self.runner.invoke(
+                interface, ["sensitivity", "2021-10-01", "--grid", "0", "0.001", "3"]
+            )
+            self.assertEqual(0, result.exit_code)
+            self.assertEqual(
+                [
+                    "    0.000000      700.00        0.00       0.00       0.00",
+                    "    0.000500      782.67       23.09      82.67       0.00",
+                    "    0.001000      866.08       51.10     166.08       0.00",
+                ],
+                result.output.splitlines()[3:],
+            )
+
 
 if __name__ == "__main__":
     unittest.main()
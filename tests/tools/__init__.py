@@ -0,0 +1,34 @@
+import csv
+import os
+import sqlite3
+
+from cli import EVENTS_SCHEMA
+
+# The directory of the test csv files and their correct outputs.
+TEST_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_rows(filename: str) -> list[tuple[str, str, str]]:
+    """Read a test csv file as `(type, amount, date_created)` rows."""
+    with open(os.path.join(TEST_DIR, filename)) as infile:
+        return [(row[0], row[2], row[1]) for row in csv.reader(infile) if row]
+
+
+def load_csv(connection: sqlite3.Connection, filename: str) -> None:
+    """Insert the rows of a test csv file into the events table."""
+    connection.executemany(
+        "insert into events (type, amount, date_created) values (?, ?, ?)",
+        read_rows(filename),
+    )
+    connection.commit()
+
+
+def create_events_db(
+    db_path: str = ":memory:", filename: str = None, schema: str = EVENTS_SCHEMA
+) -> sqlite3.Connection:
+    """Create the events table of the cli (optionally loaded with a test csv file) and return the connection."""
+    connection = sqlite3.connect(db_path)
+    connection.execute(schema)
+    if filename is not None:
+        load_csv(connection, filename)
+    return connection
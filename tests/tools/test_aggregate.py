@@ -0,0 +1,73 @@
+import datetime
+import json
+import sqlite3
+import unittest
+from decimal import Decimal
+
+from tools.aggregate import ledger_summary, register_ledger_aggregate
+from tools.ledger import compute_ledger
+
+from tests.tools import create_events_db, load_csv
+
+
+class TestLedgerAggregate(unittest.TestCase):
+    def setUp(self):
+        self.connection = create_events_db()
+        self.connection.execute("alter table events add column account varchar(32);")
+        for number in range(1, 8):
+            load_csv(self.connection, f"test{number}.csv")
+            self.connection.execute(
+                "update events set account = ? where account is null;",
+                (f"test{number}",),
+            )
+        register_ledger_aggregate(self.connection)
+
+    def tearDown(self):
+        self.connection.close()
+
+    def expected(self, account, last_date, *rate):
+        events = self.connection.execute(
+            "select id, type, amount, date_created from events where account = ? "
+            "order by date_created asc, id asc;",
+            (account,),
+        ).fetchall()
+        return ledger_summary(compute_ledger(events, last_date, *rate))
+
+    def test_group_by_matches_compute_ledger(self):
+        for end in ("2021-06-25", "2022-01-11"):
+            rows = self.connection.execute(
+                "select account, ledger(type, amount, date_created, ?) "
+                "from (select * from events order by date_created, id) "
+                "group by account order by account;",
+                (end,),
+            ).fetchall()
+            self.assertEqual(len(rows), 7)
+            for account, summary in rows:
+                with self.subTest(account=account, end=end):
+                    self.assertEqual(
+                        json.loads(summary),
+                        self.expected(account, datetime.date.fromisoformat(end)),
+                    )
+
+    def test_interest_rate_argument(self):
+        (summary,) = self.connection.execute(
+            "select ledger(type, amount, date_created, '2021-10-01', '0.001') "
+            "from (select * from events where account = 'test2' order by date_created, id);"
+        ).fetchone()
+        self.assertEqual(
+            json.loads(summary),
+            self.expected("test2", datetime.date(2021, 10, 1), Decimal("0.001")),
+        )
+
+    def test_unordered_rows_raise(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            self.connection.execute(
+                "select ledger(type, amount, date_created, '2022-01-11') "
+                "from (select * from events where account = 'test7' order by date_created desc);"
+            ).fetchone()
+
+    def test_empty_group(self):
+        (summary,) = self.connection.execute(
+            "select ledger(type, amount, date_created, '2022-01-11') from events where 0;"
+        ).fetchone()
+        self.assertIsNone(summary)
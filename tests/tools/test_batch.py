@@ -0,0 +1,92 @@
+import datetime
+import os
+import sqlite3
+import tempfile
+import unittest
+from decimal import Decimal
+
+from tools.batch import compute_file_balances, find_databases, iter_balances
+from tools.ledger import compute_ledger
+from tools.tracing import JsonlTracer, tracing
+
+from tests.tools import create_events_db
+
+LAST_DATE = datetime.date(2022, 1, 11)
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_paths = []
+        self.expected = {}
+        for number in range(1, 8):
+            db_path = os.path.join(
+                self.directory.name, f"borrower{number}", "db.sqlite3"
+            )
+            os.mkdir(os.path.dirname(db_path))
+            connection = create_events_db(db_path, f"test{number}.csv")
+            events = connection.execute(
+                "select * from events order by date_created asc;"
+            ).fetchall()
+            connection.close()
+            self.db_paths.append(db_path)
+            self.expected[db_path] = compute_ledger(events, LAST_DATE)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_find_databases(self):
+        self.assertEqual(find_databases(self.directory.name), self.db_paths)
+        manifest = os.path.join(self.directory.name, "manifest.txt")
+        with open(manifest, "w") as outfile:
+            outfile.write("# borrowers\nborrower3/db.sqlite3\n\nborrower1/db.sqlite3\n")
+        self.assertEqual(find_databases(manifest), [self.db_paths[2], self.db_paths[0]])
+
+    def test_records_match_compute_ledger(self):
+        for workers in (1, 3):
+            with self.subTest(workers=workers):
+                records = list(iter_balances(self.db_paths, LAST_DATE, workers=workers))
+                self.assertEqual([record["path"] for record in records], self.db_paths)
+                for record in records:
+                    ledger = self.expected[record["path"]]
+                    self.assertEqual(record["status"], "ok")
+                    self.assertEqual(
+                        record["interest_payable_balance"],
+                        f"{ledger.total_accrued_interest:.2f}",
+                    )
+                    self.assertEqual(
+                        record["aggregate_advance_balance"],
+                        f"{max(ledger.total_balance, Decimal(0)):.2f}",
+                    )
+
+    def test_errors_are_isolated(self):
+        broken = os.path.join(self.directory.name, "broken.sqlite3")
+        with open(broken, "w") as outfile:
+            outfile.write("not a database")
+        missing = os.path.join(self.directory.name, "missing.sqlite3")
+        records = list(
+            iter_balances([broken, self.db_paths[0], missing], LAST_DATE, workers=2)
+        )
+        self.assertEqual(
+            [record["status"] for record in records], ["error", "ok", "error"]
+        )
+        self.assertIn("DatabaseError", records[0]["error"])
+        # The connection is read-only, so a missing database is not created.
+        self.assertFalse(os.path.exists(missing))
+
+    def test_partitioned_database_is_an_error(self):
+        with sqlite3.connect(self.db_paths[0]) as connection:
+            connection.execute("create table partitioning (scheme text);")
+        connection.close()
+        record = compute_file_balances(self.db_paths[0], LAST_DATE)
+        self.assertEqual(record["status"], "error")
+        self.assertIn("partitioned", record["error"])
+
+    def test_workers_do_not_inherit_tracers(self):
+        trace_path = os.path.join(self.directory.name, "trace.jsonl")
+        # Line buffered, so anything a worker traced would reach the file.
+        with open(trace_path, "w", buffering=1) as outfile:
+            with tracing(JsonlTracer(outfile)):
+                results = list(iter_balances(self.db_paths[:2], LAST_DATE, workers=2))
+        self.assertEqual([result["status"] for result in results], ["ok", "ok"])
+        self.assertEqual(os.path.getsize(trace_path), 0)
@@ -0,0 +1,59 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from cli import CLUSTERED_EVENTS_SCHEMA
+from tools.ingest import external_sort, insert_event_rows, is_clustered
+
+from tests.tools import TEST_DIR, create_events_db
+
+
+class TestIngest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        with open(os.path.join(TEST_DIR, "test7.csv")) as infile:
+            self.rows = [line.strip().split(",") for line in infile]
+        shuffled = list(self.rows)
+        random.Random(7).shuffle(shuffled)
+        self.shuffled = shuffled
+        self.csv_path = os.path.join(self.directory.name, "events.csv")
+        with open(self.csv_path, "w") as outfile:
+            outfile.writelines(",".join(row) + "\n" for row in shuffled)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def expected_order(self):
+        # A stable sort by date keeps same-day rows in input order.
+        return sorted(self.shuffled, key=lambda row: row[1])
+
+    def test_external_sort_fits_in_memory(self):
+        self.assertEqual(
+            list(external_sort(self.csv_path, 1000)), self.expected_order()
+        )
+
+    def test_external_sort_merges_runs(self):
+        runs_dir = os.path.join(self.directory.name, "runs")
+        os.mkdir(runs_dir)
+        with mock.patch("tools.ingest.MAX_MERGE_FAN_IN", 3):
+            rows = list(external_sort(self.csv_path, 16, temp_dir=runs_dir))
+        self.assertEqual(rows, self.expected_order())
+        self.assertEqual(os.listdir(runs_dir), [])
+
+    def test_insert_into_clustered_table(self):
+        connection = create_events_db(schema=CLUSTERED_EVENTS_SCHEMA)
+        self.assertTrue(is_clustered(connection))
+        inserted = insert_event_rows(
+            connection,
+            ((row[0], row[2], row[1]) for row in external_sort(self.csv_path, 50)),
+        )
+        self.assertEqual(inserted, 500)
+        ids = [
+            row[0]
+            for row in connection.execute(
+                "select id from events order by date_created asc;"
+            )
+        ]
+        self.assertEqual(ids, list(range(1, 501)))
@@ -0,0 +1,76 @@
+import datetime
+import unittest
+from decimal import Decimal
+
+from dateutil import parser
+
+from tools.journal import compute_statement, create_journal, rebuild_journal
+from tools.ledger import compute_ledger
+
+from tests.tools import create_events_db, load_csv
+
+
+def create_connection_with_events(filename):
+    connection = create_events_db()
+    create_journal(connection)
+    load_csv(connection, filename)
+    rebuild_journal(connection)
+    return connection
+
+
+class TestJournal(unittest.TestCase):
+    def test_journal_has_one_entry_per_event(self):
+        connection = create_connection_with_events("test7.csv")
+        count = connection.execute("select count(*) from journal;").fetchone()[0]
+        self.assertEqual(count, 500)
+
+    def test_payment_split_adds_up_to_amount(self):
+        events = [
+            (1, "advance", 1000.0, "2021-05-22"),
+            (2, "payment", 500.0, "2021-05-24"),
+            (3, "payment", 600.0, "2021-05-25"),
+        ]
+        journal = []
+        compute_ledger(events, datetime.date(2021, 5, 25), journal=journal)
+        self.assertEqual(len(journal), 3)
+        for entry in journal[1:]:
+            self.assertEqual(
+                entry.amount,
+                entry.interest_paid + entry.principal_paid + entry.credit,
+            )
+        self.assertGreater(journal[1].interest_paid, Decimal(0))
+        self.assertGreater(journal[2].credit, Decimal(0))
+
+    def test_statement_closing_matches_compute_ledger(self):
+        for filename in ("test2.csv", "test5.csv", "test7.csv"):
+            connection = create_connection_with_events(filename)
+            events = connection.execute(
+                "select * from events order by date_created asc;"
+            ).fetchall()
+            first_date = parser.parse(events[0][-1]).date()
+            for end in ("2021-06-23", "2021-10-01", "2022-01-10"):
+                with self.subTest(filename=filename, end=end):
+                    end_date = datetime.date.fromisoformat(end)
+                    ledger = compute_ledger(events, end_date)
+                    period = compute_statement(connection, first_date, end_date)
+                    self.assertEqual(period.closing_balance, ledger.total_balance)
+                    self.assertEqual(
+                        period.closing_accrued_interest, ledger.total_accrued_interest
+                    )
+                    self.assertEqual(period.interest_paid, ledger.total_interest_paid)
+
+    def test_statement_periods_add_up(self):
+        connection = create_connection_with_events("test7.csv")
+        start = datetime.date(2021, 1, 1)
+        middle = datetime.date(2021, 8, 15)
+        end = datetime.date(2022, 1, 11)
+        whole = compute_statement(connection, start, end)
+        first = compute_statement(connection, start, middle)
+        second = compute_statement(connection, middle + datetime.timedelta(days=1), end)
+        self.assertEqual(first.closing_balance, second.opening_balance)
+        self.assertEqual(
+            whole.interest_accrued, first.interest_accrued + second.interest_accrued
+        )
+        self.assertEqual(
+            whole.interest_paid, first.interest_paid + second.interest_paid
+        )
@@ -11,6 +11,7 @@ from tools.ledger import (
     _update_interest,
     _perform_advance,
     _perform_payment,
+    format_remaining_balances,
 )
 
 
@@ -119,3 +120,52 @@ class TestLedgers(unittest.TestCase):
         self.assertGreater(ledger.total_balance, Decimal(0))
         self.assertGreater(ledger.total_interest_paid, Decimal(0))
         self.assertEqual(ledger.total_accrued_interest, Decimal(0))
+
+    def test_repaid_advances_should_be_archived(self):
+        ledger = create_empty_ledger()
+        for identifier, amount, day in ((1, 500, 1), (2, 300, 2), (3, 200, 3)):
+            event_data = Event(
+                identifier, "advance", Decimal(amount), datetime.date(2023, 5, day)
+            )
+            ledger = _perform_advance(ledger, event_data)
+        ledger = _perform_payment(ledger, Decimal(600))
+        self.assertEqual(ledger.advances, [Decimal(300), Decimal(200)])
+        self.assertEqual(ledger.advance_dates[0], datetime.date(2023, 5, 2))
+        self.assertEqual(ledger.repaid_advances, 1)
+        self.assertEqual(ledger.repaid_total, Decimal(500))
+        self.assertEqual(ledger.advances_total, Decimal(500))
+        self.assertEqual(
+            format_remaining_balances(
+                ledger.advances, ledger.total_balance, ledger.advances_total
+            ),
+            [Decimal(200), Decimal(200)],
+        )
+        ledger = _perform_payment(ledger, Decimal(500))
+        self.assertEqual(ledger.advances, [])
+        self.assertEqual(ledger.repaid_advances, 3)
+        self.assertEqual(ledger.total_balance, Decimal(-100))
+        # The credit covers the next advance entirely.
+        ledger = _perform_advance(
+            ledger, Event(4, "advance", Decimal(100), datetime.date(2023, 5, 4))
+        )
+        self.assertEqual(ledger.advances, [])
+        self.assertEqual(ledger.repaid_advances, 4)
+        self.assertEqual(ledger.repaid_total, Decimal(1100))
+
+    def test_compute_ledger_should_keep_history(self):
+        ledger = compute_ledger(
+            example_events_advances_and_payments,
+            datetime.date(2023, 5, 10),
+            keep_history=True,
+        )
+        compact = compute_ledger(
+            example_events_advances_and_payments, datetime.date(2023, 5, 10)
+        )
+        self.assertIsNone(compact.archive)
+        self.assertEqual(len(ledger.archive), ledger.repaid_advances)
+        self.assertEqual(
+            sum(amount for _, amount in ledger.archive), ledger.repaid_total
+        )
+        self.assertEqual(ledger.advances, compact.advances)
+        self.assertEqual(ledger.total_balance, compact.total_balance)
+        self.assertEqual(ledger.total_accrued_interest, compact.total_accrued_interest)
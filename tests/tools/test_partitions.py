@@ -0,0 +1,138 @@
+import datetime
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from tools.ledger import compute_ledger
+from tools.partitions import (
+    compute_partitioned_ledger,
+    create_catalog,
+    insert_events,
+)
+
+from tests.tools import read_rows
+
+
+def as_events(rows):
+    return sorted(
+        ((ix, row[0], float(row[1]), row[2]) for ix, row in enumerate(rows)),
+        key=lambda event: event[-1],
+    )
+
+
+class TestPartitions(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "db.sqlite3")
+        self.connection = sqlite3.connect(self.db_path)
+        create_catalog(self.connection, "monthly")
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def frozen_keys(self):
+        return [
+            row[0]
+            for row in self.connection.execute(
+                "select key from partitions where frozen = 1 order by key;"
+            )
+        ]
+
+    def test_closed_partitions_are_frozen(self):
+        insert_events(self.connection, self.db_path, read_rows("test2.csv"))
+        self.assertEqual(self.frozen_keys(), ["2021-05", "2021-06", "2021-07"])
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory.name, "db.2021-08.sqlite3"))
+        )
+
+    def test_partitioned_ledger_matches_compute_ledger(self):
+        rows = read_rows("test7.csv")
+        insert_events(self.connection, self.db_path, rows)
+        events = as_events(rows)
+        for end in ("2021-05-31", "2021-06-15", "2021-10-01", "2022-01-11"):
+            with self.subTest(end=end):
+                end_date = datetime.date.fromisoformat(end)
+                self.assertEqual(
+                    compute_partitioned_ledger(self.connection, self.db_path, end_date),
+                    compute_ledger(events, end_date),
+                )
+
+    def test_history_is_kept_apart_from_the_summaries(self):
+        rows = read_rows("test7.csv")
+        insert_events(self.connection, self.db_path, rows)
+        events = as_events(rows)
+        for end in ("2021-06-15", "2022-01-11"):
+            with self.subTest(end=end):
+                end_date = datetime.date.fromisoformat(end)
+                self.assertEqual(
+                    compute_partitioned_ledger(
+                        self.connection, self.db_path, end_date, keep_history=True
+                    ),
+                    compute_ledger(events, end_date, keep_history=True),
+                )
+        for (summary,) in self.connection.execute(
+            "select summary from partitions where frozen = 1;"
+        ):
+            self.assertNotIn("archive", json.loads(summary))
+
+    def test_renamed_database_writes_to_the_catalog_files(self):
+        rows = read_rows("test2.csv")
+        insert_events(self.connection, self.db_path, rows)
+        self.connection.close()
+        renamed_path = os.path.join(self.directory.name, "renamed.sqlite3")
+        os.rename(self.db_path, renamed_path)
+        self.connection = sqlite3.connect(renamed_path)
+        late_row = ("payment", "100.00", "2021-08-10")
+        insert_events(self.connection, renamed_path, [late_row])
+        self.assertFalse(
+            os.path.exists(os.path.join(self.directory.name, "renamed.2021-08.sqlite3"))
+        )
+        end_date = datetime.date(2021, 10, 1)
+        self.assertEqual(
+            compute_partitioned_ledger(self.connection, renamed_path, end_date),
+            compute_ledger(as_events(rows + [late_row]), end_date),
+        )
+
+    def test_late_rows_thaw_later_partitions(self):
+        rows = read_rows("test2.csv")
+        insert_events(self.connection, self.db_path, rows)
+        late_row = ("payment", "100.00", "2021-06-10")
+        insert_events(self.connection, self.db_path, [late_row])
+        self.assertEqual(self.frozen_keys(), ["2021-05", "2021-06", "2021-07"])
+        end_date = datetime.date(2021, 10, 1)
+        self.assertEqual(
+            compute_partitioned_ledger(self.connection, self.db_path, end_date),
+            compute_ledger(as_events(rows + [late_row]), end_date),
+        )
+
+    def test_presorted_rows_are_streamed(self):
+        rows = sorted(read_rows("test7.csv"), key=lambda row: row[2])
+
+        def stream():
+            months = []
+            for row in rows:
+                if row[2][:7] not in months:
+                    # Every earlier partition was written before this row is pulled.
+                    count = self.connection.execute(
+                        "select count(*) from partitions;"
+                    ).fetchone()[0]
+                    self.assertEqual(count, len(months))
+                    months.append(row[2][:7])
+                yield row
+
+        insert_events(self.connection, self.db_path, stream(), presorted=True)
+        end_date = datetime.date(2022, 1, 11)
+        self.assertEqual(
+            compute_partitioned_ledger(self.connection, self.db_path, end_date),
+            compute_ledger(as_events(rows), end_date),
+        )
+
+    def test_no_events(self):
+        self.assertIsNone(
+            compute_partitioned_ledger(
+                self.connection, self.db_path, datetime.date(2021, 1, 1)
+            )
+        )
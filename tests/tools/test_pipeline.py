@@ -0,0 +1,52 @@
+import datetime
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from tools.ledger import compute_ledger
+from tools.pipeline import iter_events
+
+from tests.tools import create_events_db
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "db.sqlite3")
+        connection = create_events_db(self.db_path, "test7.csv")
+        self.events = connection.execute(
+            "select * from events order by date_created asc;"
+        ).fetchall()
+        connection.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_yields_every_row_in_order(self):
+        rows = list(iter_events(self.db_path, block_size=7, max_blocks=2))
+        self.assertEqual(rows, self.events)
+
+    def test_matches_serial_compute_ledger(self):
+        for end in ("2021-06-01", "2021-10-01", "2022-01-11"):
+            with self.subTest(end=end):
+                last_date = datetime.date.fromisoformat(end)
+                events = iter_events(self.db_path, block_size=16, max_blocks=1)
+                self.assertEqual(
+                    compute_ledger(events, last_date),
+                    compute_ledger(self.events, last_date),
+                )
+                events.close()
+
+    def test_closing_early_stops_the_reader(self):
+        events = iter_events(self.db_path, block_size=1, max_blocks=1)
+        next(events)
+        events.close()
+        self.assertNotIn(
+            "ledger-reader", [thread.name for thread in threading.enumerate()]
+        )
+
+    def test_query_errors_are_raised(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            list(iter_events(self.db_path, query="select * from missing;"))
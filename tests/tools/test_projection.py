@@ -0,0 +1,70 @@
+import datetime
+import unittest
+from decimal import Decimal
+
+from tools.ledger import compute_ledger
+from tools.projection import project
+
+CENT = Decimal("0.000001")
+
+history = [
+    (1, "advance", 1000.0, "2021-05-22"),
+    (2, "payment", 300.0, "2021-05-30"),
+    (3, "advance", 500.0, "2021-06-10"),
+]
+
+schedule = [
+    (4, "payment", 200.0, "2021-07-01"),
+    (5, "advance", 800.0, "2021-09-15"),
+    (6, "payment", 2500.0, "2022-01-01"),
+]
+
+
+class TestProjection(unittest.TestCase):
+    def test_projection_matches_replay_with_schedule(self):
+        as_of = datetime.date(2021, 6, 20)
+        ledger = compute_ledger(history, as_of)
+        dates = [
+            datetime.date(2021, 6, 30),
+            datetime.date(2021, 7, 1),
+            datetime.date(2021, 12, 31),
+            datetime.date(2022, 1, 1),
+            datetime.date(2031, 6, 20),
+        ]
+        points = project(ledger, schedule, dates)
+        self.assertEqual([point.date for point in points], dates)
+        for point in points:
+            with self.subTest(date=point.date):
+                replayed = compute_ledger(history + schedule, point.date)
+                self.assertEqual(
+                    point.total_balance.quantize(CENT),
+                    replayed.total_balance.quantize(CENT),
+                )
+                self.assertEqual(
+                    point.total_accrued_interest.quantize(CENT),
+                    replayed.total_accrued_interest.quantize(CENT),
+                )
+                self.assertEqual(
+                    point.total_interest_paid.quantize(CENT),
+                    replayed.total_interest_paid.quantize(CENT),
+                )
+
+    def test_projection_leaves_ledger_untouched(self):
+        ledger = compute_ledger(history, datetime.date(2021, 6, 20))
+        before = compute_ledger(history, datetime.date(2021, 6, 20))
+        project(ledger, schedule, [datetime.date(2022, 6, 1)])
+        self.assertEqual(ledger, before)
+
+    def test_daily_grid(self):
+        ledger = compute_ledger(history, datetime.date(2021, 6, 20))
+        start = datetime.date(2021, 6, 21)
+        dates = [start + datetime.timedelta(days=days) for days in range(3650)]
+        points = project(ledger, schedule, dates)
+        self.assertEqual(len(points), 3650)
+        accrued = [p.total_accrued_interest + p.total_interest_paid for p in points]
+        self.assertEqual(accrued, sorted(accrued))
+
+    def test_schedule_before_ledger_raises(self):
+        ledger = compute_ledger(history, datetime.date(2021, 6, 20))
+        with self.assertRaises(ValueError):
+            project(ledger, [(4, "payment", 200.0, "2021-06-01")], [])
@@ -0,0 +1,38 @@
+import datetime
+import unittest
+from decimal import Decimal
+
+from tools.ledger import DEFAULT_INTEREST_RATE, compute_ledger
+from tools.sensitivity import compute_sensitivity
+
+from tests.tools import read_rows
+
+
+def read_events(filename):
+    return sorted(
+        (
+            (ix, row[0], float(row[1]), row[2])
+            for ix, row in enumerate(read_rows(filename))
+        ),
+        key=lambda event: event[-1],
+    )
+
+
+class TestSensitivity(unittest.TestCase):
+    def test_matches_one_replay_per_rate(self):
+        rates = [Decimal(0), DEFAULT_INTEREST_RATE, Decimal("0.0005"), Decimal("0.01")]
+        for filename, end in (("test2.csv", "2021-10-01"), ("test7.csv", "2021-10-01")):
+            events = read_events(filename)
+            last_date = datetime.date.fromisoformat(end)
+            ledgers = compute_sensitivity(events, last_date, rates)
+            for rate, ledger in zip(rates, ledgers):
+                with self.subTest(filename=filename, rate=rate):
+                    self.assertEqual(ledger, compute_ledger(events, last_date, rate))
+
+    def test_balances_diverge_with_the_rate(self):
+        events = read_events("test2.csv")
+        low, high = compute_sensitivity(
+            events, datetime.date(2021, 10, 1), [Decimal("0.0001"), Decimal("0.001")]
+        )
+        self.assertLess(low.total_balance, high.total_balance)
+        self.assertEqual(low.advances, high.advances)
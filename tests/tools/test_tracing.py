@@ -0,0 +1,91 @@
+import datetime
+import io
+import json
+import unittest
+from decimal import Decimal
+
+from tools.ledger import compute_ledger
+from tools.tracing import JsonlTracer, LedgerTracer, tracing
+
+example_events = [
+    (1, "advance", 500.0, "2023-05-03"),
+    (2, "payment", 100.0, "2023-05-10"),
+    (3, "advance", 500.0, "2023-05-15"),
+    (4, "payment", 1200.0, "2023-05-20"),
+]
+
+
+class ListTracer(LedgerTracer):
+    def __init__(self, **filters):
+        super().__init__(**filters)
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+
+class TestTracing(unittest.TestCase):
+    def test_records_every_operation(self):
+        with tracing(ListTracer()) as tracer:
+            ledger = compute_ledger(example_events, datetime.date(2023, 5, 31))
+        operations = [(r.operation, r.event_id) for r in tracer.records]
+        self.assertEqual(
+            operations,
+            [
+                ("interest", 1),
+                ("advance", 1),
+                ("interest", 2),
+                ("payment", 2),
+                ("interest", 3),
+                ("advance", 3),
+                ("interest", 4),
+                ("payment", 4),
+                ("interest", None),
+            ],
+        )
+        last = tracer.records[-1]
+        self.assertEqual(last.date, datetime.date(2023, 6, 1))
+        self.assertEqual(last.balance_after, ledger.total_balance)
+        payment = tracer.records[3]
+        self.assertEqual(payment.amount, Decimal(100))
+        self.assertEqual(
+            payment.interest_paid_after - payment.interest_paid_before,
+            payment.accrued_interest_before,
+        )
+
+    def test_no_records_once_unregistered(self):
+        with tracing(ListTracer()) as tracer:
+            pass
+        compute_ledger(example_events, datetime.date(2023, 5, 31))
+        self.assertEqual(tracer.records, [])
+
+    def test_filters(self):
+        with tracing(
+            ListTracer(start=datetime.date(2023, 5, 10), end=datetime.date(2023, 5, 15))
+        ) as by_date, tracing(ListTracer(event_ids=[4])) as by_event:
+            compute_ledger(example_events, datetime.date(2023, 5, 31))
+        self.assertEqual({r.event_id for r in by_date.records}, {2, 3})
+        self.assertEqual({r.event_id for r in by_event.records}, {4})
+
+    def test_sampling_keeps_whole_events(self):
+        events = [(ix, "advance", 10.0, f"2023-05-{ix:02d}") for ix in range(1, 29)]
+        with tracing(ListTracer(sample_rate=0.5)) as tracer:
+            compute_ledger(events, datetime.date(2023, 5, 31))
+        sampled = [r.event_id for r in tracer.records if r.event_id is not None]
+        self.assertGreater(len(set(sampled)), 0)
+        self.assertLess(len(set(sampled)), 28)
+        for event_id in set(sampled):
+            self.assertEqual(sampled.count(event_id), 2)
+
+    def test_jsonl_sink(self):
+        outfile = io.StringIO()
+        with tracing(JsonlTracer(outfile, event_ids=[2])):
+            compute_ledger(example_events, datetime.date(2023, 5, 31))
+        lines = [json.loads(line) for line in outfile.getvalue().splitlines()]
+        self.assertEqual([line["operation"] for line in lines], ["interest", "payment"])
+        self.assertEqual(
+            lines[1]["balance_delta"],
+            str(
+                Decimal(lines[1]["balance_after"]) - Decimal(lines[1]["balance_before"])
+            ),
+        )
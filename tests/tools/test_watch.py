@@ -0,0 +1,126 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from tools.journal import create_journal
+from tools.schemas import RejectedLine
+from tools.ledger import compute_ledger
+from tools.watch import ingest_batch, ledger_as_of, open_watch
+
+from tests.tools import TEST_DIR, create_events_db
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.directory.name, "db.sqlite3")
+        self.csv_path = os.path.join(self.directory.name, "events.csv")
+        self.connection = create_events_db(self.db_path)
+        create_journal(self.connection)
+        with open(os.path.join(TEST_DIR, "test7.csv")) as infile:
+            self.lines = infile.readlines()
+        open(self.csv_path, "w").close()
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def append(self, text):
+        with open(self.csv_path, "a") as outfile:
+            outfile.write(text)
+
+    def replayed_ledger(self, last_date):
+        events = self.connection.execute(
+            "select * from events order by date_created asc;"
+        ).fetchall()
+        return compute_ledger(events, last_date)
+
+    def test_incremental_batches_match_replay(self):
+        state = open_watch(self.connection, self.csv_path)
+        last_date = datetime.date(2022, 1, 11)
+        for start in range(0, len(self.lines), 137):
+            self.append("".join(self.lines[start : start + 137]))
+            while ingest_batch(self.connection, state, max_rows=50):
+                pass
+            self.assertEqual(
+                ledger_as_of(self.connection, state, last_date),
+                self.replayed_ledger(last_date),
+            )
+        count = self.connection.execute("select count(*) from events;").fetchone()[0]
+        self.assertEqual(count, 500)
+        journal = self.connection.execute("select count(*) from journal;").fetchone()
+        self.assertEqual(journal[0], 500)
+
+    def test_partial_line_is_left_for_next_batch(self):
+        state = open_watch(self.connection, self.csv_path)
+        self.append(self.lines[0] + self.lines[1][:5])
+        self.assertEqual(ingest_batch(self.connection, state), 1)
+        self.append(self.lines[1][5:])
+        self.assertEqual(ingest_batch(self.connection, state), 1)
+        self.assertEqual(state.offset, len("".join(self.lines[:2]).encode()))
+
+    def test_restart_resumes_from_offset(self):
+        self.append("".join(self.lines[:10]))
+        ingest_batch(self.connection, open_watch(self.connection, self.csv_path))
+        self.append("".join(self.lines[10:20]))
+        state = open_watch(self.connection, self.csv_path)
+        self.assertEqual(ingest_batch(self.connection, state), 10)
+        count = self.connection.execute("select count(*) from events;").fetchone()[0]
+        self.assertEqual(count, 20)
+
+    def test_out_of_order_rows_are_replayed(self):
+        state = open_watch(self.connection, self.csv_path)
+        self.append("advance,2021-05-22,1000.00\npayment,2021-06-01,200.00\n")
+        ingest_batch(self.connection, state)
+        self.append("payment,2021-05-25,300.00\n")
+        ingest_batch(self.connection, state)
+        last_date = datetime.date(2021, 7, 1)
+        self.assertEqual(
+            ledger_as_of(self.connection, state, last_date),
+            self.replayed_ledger(last_date),
+        )
+
+    def test_cutoff_before_latest_event_matches_replay(self):
+        state = open_watch(self.connection, self.csv_path)
+        self.append("".join(self.lines))
+        while ingest_batch(self.connection, state):
+            pass
+        for end in ("2021-06-01", "2021-10-01"):
+            with self.subTest(end=end):
+                last_date = datetime.date.fromisoformat(end)
+                self.assertEqual(
+                    ledger_as_of(self.connection, state, last_date),
+                    self.replayed_ledger(last_date),
+                )
+
+    def test_malformed_lines_are_skipped(self):
+        state = open_watch(self.connection, self.csv_path)
+        bad_lines = [
+            "refund,2021-05-22,10.00\n",
+            "payment,2021-05-22\n",
+            "payment,22/05/2021,10.00\n",
+            "payment,2021-05-22,ten\n",
+        ]
+        self.append("".join(bad_lines[:2]) + self.lines[0] + "".join(bad_lines[2:]))
+        rejected = []
+        self.assertEqual(ingest_batch(self.connection, state, rejected=rejected), 1)
+        first = len("".join(bad_lines[:2]) + self.lines[0])
+        self.assertEqual(
+            rejected,
+            [
+                RejectedLine(
+                    0, "refund,2021-05-22,10.00", "unknown event type 'refund'"
+                ),
+                RejectedLine(24, "payment,2021-05-22", "expected 3 fields, got 2"),
+                RejectedLine(
+                    first, "payment,22/05/2021,10.00", "invalid date '22/05/2021'"
+                ),
+                RejectedLine(
+                    first + 25, "payment,2021-05-22,ten", "invalid amount 'ten'"
+                ),
+            ],
+        )
+        self.assertEqual(state.offset, os.path.getsize(self.csv_path))
+        state = open_watch(self.connection, self.csv_path)
+        self.assertEqual(state.offset, os.path.getsize(self.csv_path))
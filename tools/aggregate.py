@@ -0,0 +1,97 @@
+import datetime
+import json
+import sqlite3
+from decimal import Decimal
+from typing import Optional
+
+from dateutil import parser
+
+from tools.ledger import DEFAULT_INTEREST_RATE, apply_events, compute_ledger
+from tools.schemas import Ledger
+
+
+def ledger_summary(ledger: Ledger) -> dict[str, str]:
+    """Return the summary statistics of a ledger, with the full Decimal precision as strings.
+
+    Args:
+        ledger (Ledger): The ledger.
+
+    Returns:
+        dict[str, str]: The summary statistics.
+    """
+    return {
+        "aggregate_advance_balance": str(max(ledger.total_balance, Decimal(0))),
+        "interest_payable_balance": str(ledger.total_accrued_interest),
+        "total_interest_paid": str(ledger.total_interest_paid),
+        "balance_applicable_to_future_advances": str(
+            max(-ledger.total_balance, Decimal(0))
+        ),
+    }
+
+
+class LedgerAggregate:
+    """A sqlite3 aggregate computing a ledger from `(type, amount, date_created, last_date[, interest_rate])` rows.
+
+    Each row is applied as it arrives, so a group costs O[1] memory beyond its advances. sqlite does not promise an order
+    to the rows of an aggregate, so they must come from a subquery ordered by `date_created, id` (sqlite 3.44+ also
+    accepts `ledger(... order by date_created, id)`); a row older than the previous one raises an error instead of
+    producing a wrong ledger. The result is the JSON text of `ledger_summary`, identical to computing the group with
+    `compute_ledger`.
+    """
+
+    def __init__(self):
+        self.ledger = Ledger([], [], None, Decimal(0), Decimal(0), Decimal(0))
+        self.last_date: Optional[datetime.date] = None
+        self.interest_rate = DEFAULT_INTEREST_RATE
+        self.previous_date: Optional[str] = None
+        self.count = 0
+
+    def step(
+        self,
+        event_type: str,
+        amount: float,
+        date_created: str,
+        last_date: str,
+        interest_rate: Optional[str] = None,
+    ) -> None:
+        if self.last_date is None:
+            self.last_date = parser.parse(last_date).date()
+            if interest_rate is not None:
+                self.interest_rate = Decimal(interest_rate)
+        # Compared as text, as sqlite orders them.
+        if self.previous_date is not None and date_created < self.previous_date:
+            raise ValueError("ledger rows must be ordered by date_created")
+        self.previous_date = date_created
+        self.count += 1
+        self.ledger = apply_events(
+            self.ledger,
+            [(self.count, event_type, amount, date_created)],
+            self.last_date,
+            self.interest_rate,
+        )
+
+    def finalize(self) -> Optional[str]:
+        if self.last_date is None:
+            return None
+        ledger = compute_ledger(
+            [], self.last_date, self.interest_rate, ledger=self.ledger
+        )
+        return json.dumps(ledger_summary(ledger))
+
+
+def register_ledger_aggregate(
+    connection: sqlite3.Connection, name: str = "ledger"
+) -> None:
+    """Register `LedgerAggregate` on a connection, with and without the interest rate argument.
+
+    Example:
+        select account, ledger(type, amount, date_created, '2022-01-01')
+        from (select * from events order by date_created, id)
+        group by account;
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        name (str, optional): The SQL function name. Defaults to "ledger".
+    """
+    connection.create_aggregate(name, 4, LedgerAggregate)
+    connection.create_aggregate(name, 5, LedgerAggregate)
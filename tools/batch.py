@@ -0,0 +1,146 @@
+import datetime
+import multiprocessing
+import os
+import pathlib
+import sqlite3
+from decimal import Decimal
+from functools import partial
+from typing import Iterable, Iterator, Optional
+from urllib.parse import quote
+
+from tools.ledger import DEFAULT_INTEREST_RATE, compute_ledger
+from tools.tracing import _TRACERS
+
+# The columns of a result record, in output order.
+RESULT_FIELDS = [
+    "path",
+    "status",
+    "events",
+    "aggregate_advance_balance",
+    "interest_payable_balance",
+    "total_interest_paid",
+    "balance_applicable_to_future_advances",
+    "error",
+]
+
+
+def find_databases(source: str, pattern: str = "**/db.sqlite3") -> list[str]:
+    """List the database files of a directory, or of a manifest file.
+
+    A manifest holds one path per line (blank lines and lines starting with # are skipped); relative paths are relative
+    to the manifest's directory.
+
+    Args:
+        source (str): The directory or the manifest file.
+        pattern (str, optional): The glob pattern of the database files in a directory. Defaults to "**/db.sqlite3".
+
+    Returns:
+        list[str]: The database paths, sorted for a directory and in manifest order otherwise.
+    """
+    if os.path.isdir(source):
+        return sorted(
+            str(path) for path in pathlib.Path(source).glob(pattern) if path.is_file()
+        )
+    directory = os.path.dirname(os.path.abspath(source))
+    with open(source) as manifest:
+        lines = (line.strip() for line in manifest)
+        return [
+            os.path.join(directory, line)
+            for line in lines
+            if line and not line.startswith("#")
+        ]
+
+
+def _connect_read_only(db_path: str) -> sqlite3.Connection:
+    """Open a read-only connection, which fails instead of creating a missing database."""
+    return sqlite3.connect(f"file:{quote(os.path.abspath(db_path))}?mode=ro", uri=True)
+
+
+def compute_file_balances(
+    db_path: str,
+    last_date: datetime.date,
+    interest_rate: Decimal = DEFAULT_INTEREST_RATE,
+) -> dict[str, Optional[str]]:
+    """Compute the summary statistics of a single database, reporting any failure in the record.
+
+    Args:
+        db_path (str): The path of the database file.
+        last_date (datetime.date): The last date to compute the interest.
+        interest_rate (Decimal, optional): The interest rate. Defaults to Decimal(0.00035).
+
+    Returns:
+        dict[str, Optional[str]]: The result record, with the `RESULT_FIELDS` keys. A failed file has the "error"
+            status and message, and no balances.
+    """
+    record = dict.fromkeys(RESULT_FIELDS)
+    record["path"] = db_path
+    try:
+        connection = _connect_read_only(db_path)
+        try:
+            if (
+                connection.execute(
+                    "select 1 from sqlite_master where name = 'partitioning';"
+                ).fetchone()
+                is not None
+            ):
+                raise ValueError("partitioned databases are not supported")
+            events = connection.execute(
+                "select * from events order by date_created asc;"
+            ).fetchall()
+            ledger = compute_ledger(events, last_date, interest_rate)
+        finally:
+            connection.close()
+    except Exception as error:
+        # A broken file must not stop the other ones.
+        record["status"] = "error"
+        record["error"] = f"{type(error).__name__}: {error}"
+        return record
+    record["status"] = "ok"
+    record["events"] = str(len(events))
+    record["aggregate_advance_balance"] = f"{max(ledger.total_balance, Decimal(0)):.2f}"
+    record["interest_payable_balance"] = f"{ledger.total_accrued_interest:.2f}"
+    record["total_interest_paid"] = f"{ledger.total_interest_paid:.2f}"
+    record[
+        "balance_applicable_to_future_advances"
+    ] = f"{max(-ledger.total_balance, Decimal(0)):.2f}"
+    return record
+
+
+def _init_worker() -> None:
+    """Drop the tracers inherited from the parent process: their files are not flushed when a worker exits."""
+    _TRACERS.clear()
+
+
+def iter_balances(
+    db_paths: Iterable[str],
+    last_date: datetime.date,
+    interest_rate: Decimal = DEFAULT_INTEREST_RATE,
+    workers: Optional[int] = None,
+    chunksize: int = 16,
+) -> Iterator[dict[str, Optional[str]]]:
+    """Yield the result record of every database, computing them in a pool of processes.
+
+    Replaying a ledger is pure Python, so a thread pool would be bound by the GIL; each worker process opens its own
+    read-only connection to the file it computes. Records are yielded in the order of `db_paths` as soon as they are
+    ready, and a failing file only produces an error record. The workers do not trace: the registered tracers only see
+    the files computed in this process (`workers=1`).
+
+    Args:
+        db_paths (Iterable[str]): The database paths.
+        last_date (datetime.date): The last date to compute the interest.
+        interest_rate (Decimal, optional): The interest rate. Defaults to Decimal(0.00035).
+        workers (Optional[int], optional): The number of processes; 1 computes in this process. Defaults to the
+            number of CPUs.
+        chunksize (int, optional): The number of files sent to a worker at once. Defaults to 16.
+
+    Yields:
+        dict[str, Optional[str]]: The result records.
+    """
+    compute = partial(
+        compute_file_balances, last_date=last_date, interest_rate=interest_rate
+    )
+    if workers == 1:
+        yield from map(compute, db_paths)
+        return
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        yield from pool.imap(compute, db_paths, chunksize)
@@ -0,0 +1,135 @@
+import csv
+import heapq
+import os
+import sqlite3
+import tempfile
+from typing import Iterable, Iterator, Optional
+
+# The number of sorted runs merged at once, so the merge never holds more than this many files open.
+MAX_MERGE_FAN_IN = 64
+
+
+def is_clustered(connection: sqlite3.Connection) -> bool:
+    """Check whether the events table is clustered, i.e. a `WITHOUT ROWID` table keyed by `(date_created, id)`.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+
+    Returns:
+        bool: True if the events table is clustered.
+    """
+    row = connection.execute(
+        "select sql from sqlite_master where type = 'table' and name = 'events';"
+    ).fetchone()
+    return row is not None and "without rowid" in row[0].lower()
+
+
+def insert_event_rows(
+    connection: sqlite3.Connection, rows: Iterable[tuple[str, str, str]]
+) -> int:
+    """Insert `(type, amount, date_created)` rows into the events table.
+
+    A clustered table has no rowid to number the events, so the identifiers are assigned here, after the largest one.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        rows (Iterable[tuple[str, str, str]]): The rows to insert.
+
+    Returns:
+        int: The number of inserted rows.
+    """
+    cursor = connection.cursor()
+    if not is_clustered(connection):
+        cursor.executemany(
+            "insert into events (type, amount, date_created) values (?, ?, ?)", rows
+        )
+        return cursor.rowcount
+    last_id = cursor.execute("select max(id) from events;").fetchone()[0] or 0
+    cursor.executemany(
+        "insert into events (id, type, amount, date_created) values (?, ?, ?, ?)",
+        ((identifier, *row) for identifier, row in enumerate(rows, start=last_id + 1)),
+    )
+    return cursor.rowcount
+
+
+def _sort_key(numbered_row: list[str]) -> tuple[str, int]:
+    # Dates are compared as text, as sqlite does in `order by date_created`; the line number keeps the input order.
+    return numbered_row[2], int(numbered_row[0])
+
+
+def _write_run(rows: list[list[str]], directory: str) -> str:
+    """Write a sorted run to a new temporary file and return its path."""
+    handle, path = tempfile.mkstemp(suffix=".csv", dir=directory)
+    with os.fdopen(handle, "w", newline="") as outfile:
+        csv.writer(outfile).writerows(rows)
+    return path
+
+
+def _merge_runs(paths: list[str]) -> Iterator[list[str]]:
+    """Merge sorted runs, removing the files once consumed."""
+    infiles = [open(path, newline="") for path in paths]
+    try:
+        yield from heapq.merge(
+            *(csv.reader(infile) for infile in infiles), key=_sort_key
+        )
+    finally:
+        for infile in infiles:
+            infile.close()
+        for path in paths:
+            os.unlink(path)
+
+
+def _merge_to_run(paths: list[str], directory: str) -> str:
+    """Merge sorted runs into a new run and return its path."""
+    handle, path = tempfile.mkstemp(suffix=".csv", dir=directory)
+    with os.fdopen(handle, "w", newline="") as outfile:
+        csv.writer(outfile).writerows(_merge_runs(paths))
+    return path
+
+
+def external_sort(
+    filename: str, max_rows_in_memory: int, temp_dir: Optional[str] = None
+) -> Iterator[list[str]]:
+    """Yield the rows of a csv file sorted by date, with ties kept in input order.
+
+    The file is read in chunks of at most `max_rows_in_memory` rows, each chunk is sorted and written to temporary disk
+    as a run, and the runs are combined with a k-way merge (in several passes if there are more than
+    `MAX_MERGE_FAN_IN`). Memory use is bounded by the chunk size regardless of the size of the file.
+
+    Function complexity: O[n log n] time, O[max_rows_in_memory] memory.
+
+    Args:
+        filename (str): The csv file, with `type,date,amount` rows.
+        max_rows_in_memory (int): The maximum number of rows held in memory at once.
+        temp_dir (Optional[str], optional): Where to write the runs. Defaults to the system temporary directory.
+
+    Yields:
+        list[str]: The csv rows, in `(date, line)` order.
+    """
+    with tempfile.TemporaryDirectory(dir=temp_dir) as directory:
+        runs = []
+        with open(filename, newline="") as infile:
+            chunk = []
+            for line_number, row in enumerate(csv.reader(infile)):
+                if not row:
+                    continue
+                chunk.append([str(line_number), *row])
+                if len(chunk) >= max_rows_in_memory:
+                    chunk.sort(key=_sort_key)
+                    runs.append(_write_run(chunk, directory))
+                    chunk = []
+            chunk.sort(key=_sort_key)
+            if not runs:
+                # Everything fit in memory, there is nothing to merge.
+                for numbered_row in chunk:
+                    yield numbered_row[1:]
+                return
+            if chunk:
+                runs.append(_write_run(chunk, directory))
+        while len(runs) > MAX_MERGE_FAN_IN:
+            runs = [
+                _merge_to_run(runs[start : start + MAX_MERGE_FAN_IN], directory)
+                for start in range(0, len(runs), MAX_MERGE_FAN_IN)
+            ]
+        for numbered_row in _merge_runs(runs):
+            yield numbered_row[1:]
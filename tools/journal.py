@@ -0,0 +1,219 @@
+import datetime
+import sqlite3
+from decimal import Decimal
+
+from dateutil import parser
+
+from tools.ledger import DEFAULT_INTEREST_RATE, _update_interest, compute_ledger
+from tools.schemas import JournalEntry, Ledger, Statement
+
+# Amounts are stored as text so the Decimal values survive the round trip (the `decimal` affinity would turn them into
+# floats).
+JOURNAL_SCHEMA = """
+    create table journal
+    (
+        sequence integer not null primary key,
+        event_id integer not null,
+        type varchar(32) not null,
+        amount text not null,
+        date_created date not null,
+        interest_accrued text not null,
+        interest_paid text not null,
+        principal_paid text not null,
+        credit text not null,
+        total_balance text not null,
+        total_accrued_interest text not null,
+        total_interest_paid text not null
+    );
+"""
+JOURNAL_INDEX = "create index journal_date_created on journal (date_created, sequence);"
+
+_JOURNAL_COLUMNS = (
+    "event_id, type, amount, date_created, interest_accrued, interest_paid, principal_paid, credit, total_balance, "
+    "total_accrued_interest, total_interest_paid"
+)
+
+
+def create_journal(connection: sqlite3.Connection) -> None:
+    """Create the journal table and its date index.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+    """
+    connection.execute(JOURNAL_SCHEMA)
+    connection.execute(JOURNAL_INDEX)
+
+
+def has_journal(connection: sqlite3.Connection) -> bool:
+    """Check whether the database has a journal table.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+
+    Returns:
+        bool: True if the journal table exists.
+    """
+    row = connection.execute(
+        "select 1 from sqlite_master where type = 'table' and name = 'journal';"
+    ).fetchone()
+    return row is not None
+
+
+def rebuild_journal(
+    connection: sqlite3.Connection, interest_rate: Decimal = DEFAULT_INTEREST_RATE
+) -> int:
+    """Replay every event once and store the resulting journal, replacing the previous one.
+
+    Function complexity: O[n] (where n is the number of events).
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        interest_rate (Decimal, optional): The interest rate. Defaults to Decimal(0.00035).
+
+    Returns:
+        int: The number of journal entries written.
+    """
+    events = connection.execute(
+        "select * from events order by date_created asc;"
+    ).fetchall()
+    journal: list[JournalEntry] = []
+    if events:
+        last_date = parser.parse(events[-1][-1]).date()
+        compute_ledger(events, last_date, interest_rate, journal=journal)
+    connection.execute("delete from journal;")
+    append_journal(connection, journal)
+    return len(journal)
+
+
+def append_journal(connection: sqlite3.Connection, journal: list[JournalEntry]) -> None:
+    """Append entries after the last stored journal entry.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        journal (list[JournalEntry]): The entries, in replay order.
+    """
+    last_sequence = connection.execute("select max(sequence) from journal;").fetchone()[
+        0
+    ]
+    first_sequence = 0 if last_sequence is None else last_sequence + 1
+    connection.executemany(
+        f"insert into journal (sequence, {_JOURNAL_COLUMNS}) values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (
+                sequence,
+                entry.event_id,
+                entry.event_type,
+                str(entry.amount),
+                entry.date_created.isoformat(),
+                str(entry.interest_accrued),
+                str(entry.interest_paid),
+                str(entry.principal_paid),
+                str(entry.credit),
+                str(entry.total_balance),
+                str(entry.total_accrued_interest),
+                str(entry.total_interest_paid),
+            )
+            for sequence, entry in enumerate(journal, start=first_sequence)
+        ),
+    )
+
+
+def _parse_journal_row(row: tuple) -> JournalEntry:
+    """Parse a journal row (in `_JOURNAL_COLUMNS` order) into a JournalEntry object.
+
+    Args:
+        row (tuple): The journal row.
+
+    Returns:
+        JournalEntry: The parsed entry.
+    """
+    return JournalEntry(
+        row[0],
+        row[1],
+        Decimal(row[2]),
+        datetime.date.fromisoformat(row[3]),
+        *(Decimal(value) for value in row[4:]),
+    )
+
+
+def _ledger_at(
+    connection: sqlite3.Connection, day: datetime.date, interest_rate: Decimal
+) -> Ledger:
+    """Rebuild the ledger totals at the end of `day` from the last journal entry on or before it.
+
+    Function complexity: O[log n] (a single index lookup).
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        day (datetime.date): The day.
+        interest_rate (Decimal): The interest rate.
+
+    Returns:
+        Ledger: A ledger holding only the totals (advances are not loaded).
+    """
+    row = connection.execute(
+        f"select {_JOURNAL_COLUMNS} from journal where date_created <= ? "
+        "order by date_created desc, sequence desc limit 1;",
+        (day.isoformat(),),
+    ).fetchone()
+    if row is None:
+        return Ledger([], [], None, Decimal(0), Decimal(0), Decimal(0))
+    entry = _parse_journal_row(row)
+    ledger = Ledger(
+        [],
+        [],
+        entry.date_created,
+        entry.total_accrued_interest,
+        entry.total_interest_paid,
+        entry.total_balance,
+    )
+    # Balances are taken at the end of the day, so the interest of `day` itself is included.
+    return _update_interest(ledger, day + datetime.timedelta(days=1), interest_rate)
+
+
+def compute_statement(
+    connection: sqlite3.Connection,
+    start: datetime.date,
+    end: datetime.date,
+    interest_rate: Decimal = DEFAULT_INTEREST_RATE,
+) -> Statement:
+    """Compute the ledger activity between `start` and `end` (both inclusive) from the journal.
+
+    Function complexity: O[log n + k] (where n is the number of journal entries and k the entries in the period): two
+    boundary lookups and one range scan over the date index, instead of a full replay.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        start (datetime.date): The first day of the period.
+        end (datetime.date): The last day of the period.
+        interest_rate (Decimal, optional): The interest rate. Defaults to Decimal(0.00035).
+
+    Returns:
+        Statement: The statement of the period.
+    """
+    opening = _ledger_at(connection, start - datetime.timedelta(days=1), interest_rate)
+    closing = _ledger_at(connection, end, interest_rate)
+    entries = [
+        _parse_journal_row(row)
+        for row in connection.execute(
+            f"select {_JOURNAL_COLUMNS} from journal where date_created between ? and ? order by date_created, "
+            "sequence;",
+            (start.isoformat(), end.isoformat()),
+        )
+    ]
+    # Accrued interest only leaves `total_accrued_interest` by being paid, so their sum is the interest accrued to date.
+    interest_accrued = (
+        closing.total_accrued_interest + closing.total_interest_paid
+    ) - (opening.total_accrued_interest + opening.total_interest_paid)
+    return Statement(
+        start,
+        end,
+        opening.total_balance,
+        opening.total_accrued_interest,
+        closing.total_balance,
+        closing.total_accrued_interest,
+        interest_accrued,
+        sum((entry.interest_paid for entry in entries), Decimal(0)),
+        sum((entry.principal_paid for entry in entries), Decimal(0)),
+        entries,
+    )
@@ -1,14 +1,20 @@
 import datetime
 from decimal import Decimal
 
-from typing import Optional
+from typing import Callable, Iterable, Optional
 
 from dateutil import parser
 
-from tools.schemas import Ledger, Event
+from tools.schemas import Ledger, Event, JournalEntry
+from tools.tracing import _TRACERS, traced
 
+DEFAULT_INTEREST_RATE = Decimal(0.00035)
 
-def _perform_payment(ledger: Ledger, payment_amount: Decimal) -> Ledger:
+
+@traced("payment")
+def _perform_payment(
+    ledger: Ledger, payment_amount: Decimal, event: Optional[Event] = None
+) -> Ledger:
     """Add a payment to the ledger.
 
     The process is: first we pay the accrued interest, then we pay the balances.
@@ -16,6 +22,7 @@ def _perform_payment(ledger: Ledger, payment_amount: Decimal) -> Ledger:
     Args:
         ledger (Ledger): The ledger.
         payment_amount (Decimal): The payment amount.
+        event (Optional[Event], optional): The payment event, only reported to the tracers. Defaults to None.
 
     Returns:
         Ledger: The updated ledger.
@@ -36,9 +43,10 @@ def _perform_payment(ledger: Ledger, payment_amount: Decimal) -> Ledger:
         ledger.total_balance -= payment_amount
     elif ledger.total_balance > 0:
         ledger.total_balance -= payment_amount
-    return ledger
+    return _archive_repaid(ledger)
 
 
+@traced("advance")
 def _perform_advance(ledger: Ledger, event_data: Event) -> Ledger:
     """Add an advance to the ledger.
 
@@ -53,14 +61,63 @@ def _perform_advance(ledger: Ledger, event_data: Event) -> Ledger:
     """
     ledger.advance_dates.append(event_data.date_created)
     ledger.advances.append(event_data.amount)
+    ledger.advances_total += event_data.amount
     ledger.total_balance += event_data.amount
     if ledger.last_balance_update_date is None:
         ledger.last_balance_update_date = event_data.date_created
+    if ledger.total_balance <= 0:
+        # The advance was covered by the payments made in advance.
+        return _archive_repaid(ledger)
+    return ledger
+
+
+def _archive_repaid(ledger: Ledger) -> Ledger:
+    """Move the fully repaid advances out of the outstanding advances.
+
+    Payments repay the oldest advances first, so whatever was repaid on the outstanding advances
+    (`advances_total - total_balance`) covers a prefix of them. That prefix is counted in `repaid_advances` and
+    `repaid_total`, and appended to `archive` when the ledger keeps one.
+
+    Function complexity: O[1] when nothing is repaid, O[h] otherwise (where h is the number of outstanding advances).
+
+    Args:
+        ledger (Ledger): The ledger to update.
+
+    Returns:
+        Ledger: The updated ledger.
+    """
+    if ledger.total_balance <= 0:
+        repaid_count = len(ledger.advances)
+    else:
+        repaid = ledger.advances_total - ledger.total_balance
+        repaid_count = 0
+        while (
+            repaid_count < len(ledger.advances)
+            and ledger.advances[repaid_count] <= repaid
+        ):
+            repaid -= ledger.advances[repaid_count]
+            repaid_count += 1
+    if repaid_count == 0:
+        return ledger
+    repaid_amount = sum(ledger.advances[:repaid_count], Decimal(0))
+    if ledger.archive is not None:
+        ledger.archive.extend(
+            zip(ledger.advance_dates[:repaid_count], ledger.advances[:repaid_count])
+        )
+    del ledger.advance_dates[:repaid_count]
+    del ledger.advances[:repaid_count]
+    ledger.repaid_advances += repaid_count
+    ledger.repaid_total += repaid_amount
+    ledger.advances_total -= repaid_amount
     return ledger
 
 
+@traced("interest")
 def _update_interest(
-    ledger: Ledger, current_date: Optional[datetime.date], interest_rate: Decimal
+    ledger: Ledger,
+    current_date: Optional[datetime.date],
+    interest_rate: Decimal,
+    event: Optional[Event] = None,
 ) -> Ledger:
     """Update the interest accrued in the ledger.
 
@@ -70,6 +127,8 @@ def _update_interest(
         ledger (Ledger): The ledger to update.
         current_date (Optional[datetime.date]): The current date.
         interest_rate (Decimal): The interest rate.
+        event (Optional[Event], optional): The event the interest is updated for, only reported to the tracers.
+            Defaults to None.
 
     Returns:
         Ledger: The updated ledger.
@@ -93,6 +152,22 @@ def _update_interest(
     return ledger
 
 
+# The operations applied per event: interest, advance and payment. Replay loops pick them once per call and take the
+# undecorated ones when no tracer is registered, so tracing costs nothing per event unless a tracer is registered.
+_TRACED_OPERATIONS = (_update_interest, _perform_advance, _perform_payment)
+_UNTRACED_OPERATIONS = tuple(operation.__wrapped__ for operation in _TRACED_OPERATIONS)
+
+
+def _operations() -> tuple[Callable, Callable, Callable]:
+    """Return the interest, advance and payment operations, without the tracing wrapper when no tracer is registered.
+
+    Replay loops call it once, so a tracer registered during a replay only sees the later ones.
+
+    Function complexity: O[1]
+    """
+    return _TRACED_OPERATIONS if _TRACERS else _UNTRACED_OPERATIONS
+
+
 def _parse_event_tuple(event: tuple[int, str, float, str]) -> Event:
     """Parse the event tuple into an Event object.
 
@@ -107,61 +182,191 @@ def _parse_event_tuple(event: tuple[int, str, float, str]) -> Event:
     return Event(event[0], event[1], amount, event_date)
 
 
-def compute_ledger(
-    events: list[tuple[int, str, float, str]],
+def _journal_entry(
+    ledger: Ledger,
+    event: Event,
+    accrued_delta: Decimal,
+    paid_before: Decimal,
+    balance_before: Decimal,
+) -> JournalEntry:
+    """Build the journal entry for an event that was just applied to the ledger.
+
+    The payment split is derived from the ledger totals before and after `_perform_payment`: whatever moved into
+    `total_interest_paid` went to interest, whatever reduced the positive balance went to principal and the rest is
+    credit for future advances.
+
+    Function complexity: O[1]
+
+    Args:
+        ledger (Ledger): The ledger after the event was applied.
+        event (Event): The applied event.
+        accrued_delta (Decimal): The interest accrued between the previous event and this one.
+        paid_before (Decimal): The total interest paid before the event.
+        balance_before (Decimal): The total balance before the event.
+
+    Returns:
+        JournalEntry: The journal entry.
+    """
+    interest_paid = Decimal(0)
+    principal_paid = Decimal(0)
+    credit = Decimal(0)
+    if event.event_type == "payment":
+        interest_paid = ledger.total_interest_paid - paid_before
+        principal_paid = max(balance_before, Decimal(0)) - max(
+            ledger.total_balance, Decimal(0)
+        )
+        credit = event.amount - interest_paid - principal_paid
+    return JournalEntry(
+        event.identifier,
+        event.event_type,
+        event.amount,
+        event.date_created,
+        accrued_delta,
+        interest_paid,
+        principal_paid,
+        credit,
+        ledger.total_balance,
+        ledger.total_accrued_interest,
+        ledger.total_interest_paid,
+    )
+
+
+def apply_events(
+    ledger: Ledger,
+    events: Iterable[tuple[int, str, float, str]],
     last_date: datetime.date,
-    interest_rate: Decimal = Decimal(0.00035),
+    interest_rate: Decimal = DEFAULT_INTEREST_RATE,
+    journal: Optional[list[JournalEntry]] = None,
 ) -> Ledger:
-    """Compute the advancement and balance ledger.
+    """Apply the events up to `last_date` (inclusive) to the ledger.
 
-    Function complexity: O[n] (where n is the number of events). Capped by the last_date (it can be O[1] if last_date
-    is less than the first operation). There are some rare situations where the solution can be a little more complex
-    (as when lists overflow and need to be recomputed) - but that is related to python's limitations (unless we
-    implemented our own linked list solution, which would be overkill).
+    The interest is only accrued up to the last applied event, so the result can be used as the starting state of a
+    later call with the events that follow.
+
+    Function complexity: O[n] (where n is the number of events), capped by the last_date.
 
     Args:
-        events (list[tuple[int, str, float, str]]): The events.
-        last_date (datetime.date): The last date to compute the interest.
+        ledger (Ledger): The ledger to update.
+        events (Iterable[tuple[int, str, float, str]]): The events, ordered by date.
+        last_date (datetime.date): The last date of the events to apply.
         interest_rate (Decimal, optional): The interest rate. Defaults to Decimal(0.00035).
+        journal (Optional[list[JournalEntry]], optional): When given, one entry per applied event is appended to it,
+            with the interest accrued since the previous event, the payment split and the running totals.
 
     Returns:
-        Ledger: The ledger dataclass with the information to display the balance.
-
+        Ledger: The updated ledger.
     """
-    ledger = Ledger([], [], None, Decimal(0), Decimal(0), Decimal(0))
-    last_date_used = False
+    update_interest, perform_advance, perform_payment = _operations()
+    if journal is None:
+        for event in events:
+            parsed_event = _parse_event_tuple(event)
+            if parsed_event.date_created > last_date:
+                break
+            # We update the interest for the current event.
+            ledger = update_interest(
+                ledger, parsed_event.date_created, interest_rate, event=parsed_event
+            )
+
+            if parsed_event.event_type == "advance":
+                ledger = perform_advance(ledger, parsed_event)
+
+            else:
+                ledger = perform_payment(
+                    ledger, parsed_event.amount, event=parsed_event
+                )
+        return ledger
 
+    # The same loop, also recording the effect of every event in the journal.
     for event in events:
         parsed_event = _parse_event_tuple(event)
         if parsed_event.date_created > last_date:
-            # As we want to compute the interest for the last day, we add 1 day to the last date.
-            last_date = last_date + datetime.timedelta(days=1)
-            ledger = _update_interest(ledger, last_date, interest_rate)
-            last_date_used = True
             break
-        # We update the interest for the current event.
-        ledger = _update_interest(ledger, parsed_event.date_created, interest_rate)
+        accrued_before = ledger.total_accrued_interest
+        paid_before = ledger.total_interest_paid
+        ledger = update_interest(
+            ledger, parsed_event.date_created, interest_rate, event=parsed_event
+        )
+        accrued_delta = ledger.total_accrued_interest - accrued_before
+        balance_before = ledger.total_balance
 
         if parsed_event.event_type == "advance":
-            ledger = _perform_advance(ledger, parsed_event)
+            ledger = perform_advance(ledger, parsed_event)
 
         else:
-            ledger = _perform_payment(ledger, parsed_event.amount)
-
-    if not last_date_used:
-        # As we want to compute the interest for the last day, we add 1 day to the last date.
-        last_date = last_date + datetime.timedelta(days=1)
-        ledger = _update_interest(ledger, last_date, interest_rate)
+            ledger = perform_payment(ledger, parsed_event.amount, event=parsed_event)
 
+        journal.append(
+            _journal_entry(
+                ledger, parsed_event, accrued_delta, paid_before, balance_before
+            )
+        )
     return ledger
 
 
+def compute_ledger(
+    events: Iterable[tuple[int, str, float, str]],
+    last_date: datetime.date,
+    interest_rate: Decimal = DEFAULT_INTEREST_RATE,
+    journal: Optional[list[JournalEntry]] = None,
+    ledger: Optional[Ledger] = None,
+    keep_history: bool = False,
+) -> Ledger:
+    """Compute the advancement and balance ledger.
+
+    Function complexity: O[n] (where n is the number of events). Capped by the last_date (it can be O[1] if last_date
+    is less than the first operation). There are some rare situations where the solution can be a little more complex
+    (as when lists overflow and need to be recomputed) - but that is related to python's limitations (unless we
+    implemented our own linked list solution, which would be overkill).
+
+    Args:
+        events (Iterable[tuple[int, str, float, str]]): The events.
+        last_date (datetime.date): The last date to compute the interest.
+        interest_rate (Decimal, optional): The interest rate. Defaults to Decimal(0.00035).
+        journal (Optional[list[JournalEntry]], optional): When given, one entry per applied event is appended to it,
+            with the interest accrued since the previous event, the payment split and the running totals.
+        ledger (Optional[Ledger], optional): The state to start from, as returned by `apply_events` for the events
+            before these ones. Defaults to an empty ledger.
+        keep_history (bool, optional): Keep the fully repaid advances in `archive` instead of only counting them.
+            Ignored when `ledger` is given, which keeps its own archive (or not). Defaults to False.
+
+    Returns:
+        Ledger: The ledger dataclass with the information to display the balance.
+
+    """
+    if ledger is None:
+        ledger = Ledger([], [], None, Decimal(0), Decimal(0), Decimal(0))
+        if keep_history:
+            ledger.archive = []
+    ledger = apply_events(ledger, events, last_date, interest_rate, journal)
+    # As we want to compute the interest for the last day, we add 1 day to the last date.
+    last_date = last_date + datetime.timedelta(days=1)
+    return _update_interest(ledger, last_date, interest_rate)
+
+
 def format_remaining_balances(
-    advances: list[Decimal], total_balance: Decimal
+    advances: list[Decimal],
+    total_balance: Decimal,
+    advances_total: Optional[Decimal] = None,
 ) -> list[Decimal]:
+    """Return the remaining balance of each advance, repaying the oldest first.
+
+    Function complexity: O[h] (where h is the number of advances given, i.e. the outstanding ones for a compacted
+    ledger).
+
+    Args:
+        advances (list[Decimal]): The advances.
+        total_balance (Decimal): The total balance.
+        advances_total (Optional[Decimal], optional): The total of `advances`, when already known. Defaults to their
+            sum.
+
+    Returns:
+        list[Decimal]: The remaining balances, in the order of `advances`.
+    """
     if total_balance <= 0:
         return [Decimal(0)] * len(advances)
-    value_subtracted = sum(advances) - total_balance
+    if advances_total is None:
+        advances_total = sum(advances)
+    value_subtracted = advances_total - total_balance
     remaining_balances = []
     for advance in advances:
         if value_subtracted > advance:
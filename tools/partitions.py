@@ -0,0 +1,369 @@
+import calendar
+import datetime
+import json
+import os
+import sqlite3
+from decimal import Decimal
+from itertools import groupby
+from typing import Callable, Iterable, Optional
+
+from dateutil import parser
+
+from tools.ledger import DEFAULT_INTEREST_RATE, apply_events, compute_ledger
+from tools.schemas import Ledger
+
+# The catalog lives in the main database, the events live in one sqlite file per period. A frozen partition keeps the
+# ledger at its end in `summary`, and the advances fully repaid during the partition in `archive`, which is only read
+# to list the full history.
+CATALOG_SCHEMA = (
+    """
+    create table partitioning
+    (
+        scheme varchar(16) not null
+    );
+    """,
+    """
+    create table partitions
+    (
+        key varchar(16) not null primary key,
+        period_start date not null,
+        period_end date not null,
+        filename text not null,
+        frozen integer not null default 0,
+        summary text,
+        archive text
+    );
+    """,
+)
+PARTITION_SCHEMA = """
+    create table if not exists {schema}.events
+    (
+        id integer not null primary key autoincrement,
+        type varchar(32) not null,
+        amount decimal not null,
+        date_created date not null
+        CHECK (type IN ("advance", "payment"))
+    );
+"""
+
+
+def _yearly_period(day: datetime.date) -> tuple[str, datetime.date, datetime.date]:
+    return str(day.year), datetime.date(day.year, 1, 1), datetime.date(day.year, 12, 31)
+
+
+def _monthly_period(day: datetime.date) -> tuple[str, datetime.date, datetime.date]:
+    last_day = calendar.monthrange(day.year, day.month)[1]
+    return (
+        f"{day.year:04d}-{day.month:02d}",
+        datetime.date(day.year, day.month, 1),
+        datetime.date(day.year, day.month, last_day),
+    )
+
+
+# Maps a scheme name to the function returning the (key, first day, last day) of the period holding a date.
+PARTITION_SCHEMES: dict[
+    str, Callable[[datetime.date], tuple[str, datetime.date, datetime.date]]
+] = {
+    "yearly": _yearly_period,
+    "monthly": _monthly_period,
+}
+
+
+def create_catalog(connection: sqlite3.Connection, scheme: str) -> None:
+    """Create the partition catalog in the main database.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        scheme (str): The partitioning scheme, one of `PARTITION_SCHEMES`.
+    """
+    for statement in CATALOG_SCHEMA:
+        connection.execute(statement)
+    connection.execute("insert into partitioning (scheme) values (?);", (scheme,))
+
+
+def get_scheme(connection: sqlite3.Connection) -> Optional[str]:
+    """Return the partitioning scheme of the database, or None if the events are not partitioned.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+
+    Returns:
+        Optional[str]: The partitioning scheme.
+    """
+    table = connection.execute(
+        "select 1 from sqlite_master where type = 'table' and name = 'partitioning';"
+    ).fetchone()
+    if table is None:
+        return None
+    return connection.execute("select scheme from partitioning;").fetchone()[0]
+
+
+def partition_files(connection: sqlite3.Connection, db_path: str) -> list[str]:
+    """Return the paths of every partition file of the database.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        db_path (str): The path of the main database.
+
+    Returns:
+        list[str]: The partition file paths.
+    """
+    directory = os.path.dirname(db_path)
+    return [
+        os.path.join(directory, row[0])
+        for row in connection.execute("select filename from partitions order by key;")
+    ]
+
+
+def _ledger_to_json(ledger: Ledger) -> str:
+    return json.dumps(
+        {
+            "advance_dates": [day.isoformat() for day in ledger.advance_dates],
+            "advances": [str(advance) for advance in ledger.advances],
+            "last_balance_update_date": None
+            if ledger.last_balance_update_date is None
+            else ledger.last_balance_update_date.isoformat(),
+            "total_accrued_interest": str(ledger.total_accrued_interest),
+            "total_interest_paid": str(ledger.total_interest_paid),
+            "total_balance": str(ledger.total_balance),
+            "repaid_advances": ledger.repaid_advances,
+            "repaid_total": str(ledger.repaid_total),
+            "advances_total": str(ledger.advances_total),
+        }
+    )
+
+
+def _ledger_from_json(summary: str) -> Ledger:
+    data = json.loads(summary)
+    last_update = data["last_balance_update_date"]
+    # Summaries frozen before the repaid advances were archived keep every advance in "advances".
+    advances_total = data.get("advances_total")
+    return Ledger(
+        [datetime.date.fromisoformat(day) for day in data["advance_dates"]],
+        [Decimal(advance) for advance in data["advances"]],
+        None if last_update is None else datetime.date.fromisoformat(last_update),
+        Decimal(data["total_accrued_interest"]),
+        Decimal(data["total_interest_paid"]),
+        Decimal(data["total_balance"]),
+        data.get("repaid_advances", 0),
+        Decimal(data.get("repaid_total", 0)),
+        None if advances_total is None else Decimal(advances_total),
+    )
+
+
+def _archive_to_json(archive: list[tuple[datetime.date, Decimal]]) -> str:
+    return json.dumps([[day.isoformat(), str(advance)] for day, advance in archive])
+
+
+def _archive_from_json(archive: Optional[str]) -> list[tuple[datetime.date, Decimal]]:
+    if archive is None:
+        return []
+    return [
+        (datetime.date.fromisoformat(day), Decimal(advance))
+        for day, advance in json.loads(archive)
+    ]
+
+
+def _schema_name(key: str) -> str:
+    return "p_" + key.replace("-", "_")
+
+
+def _attach(
+    connection: sqlite3.Connection, db_path: str, key: str, filename: str
+) -> str:
+    """Attach a partition file (creating it if needed) and return its schema name.
+
+    `ATTACH` can not run inside a transaction, so any pending write is committed first.
+    """
+    connection.commit()
+    schema = _schema_name(key)
+    connection.execute(
+        f"attach database ? as {schema};",
+        (os.path.join(os.path.dirname(db_path), filename),),
+    )
+    return schema
+
+
+def _detach(connection: sqlite3.Connection, schema: str) -> None:
+    connection.commit()
+    connection.execute(f"detach database {schema};")
+
+
+def insert_events(
+    connection: sqlite3.Connection,
+    db_path: str,
+    rows: Iterable[tuple[str, str, str]],
+    interest_rate: Decimal = DEFAULT_INTEREST_RATE,
+    presorted: bool = False,
+) -> int:
+    """Insert `(type, amount, date_created)` rows into their period partitions.
+
+    The rows are sorted in memory to group them by partition, unless `presorted` says they already come in date order
+    (e.g. from `external_sort`): they are then streamed, one partition at a time. Each partition is attached only while
+    its rows are written. Rows landing in a frozen partition thaw it and every
+    later partition, as their summaries are no longer valid. Afterwards every partition that ends before the newest one
+    starts is frozen (see `freeze_partitions`).
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        db_path (str): The path of the main database.
+        rows (Iterable[tuple[str, str, str]]): The rows to insert.
+        interest_rate (Decimal, optional): The interest rate used for the summaries. Defaults to Decimal(0.00035).
+        presorted (bool, optional): The rows are already ordered by date. Defaults to False.
+
+    Returns:
+        int: The number of inserted rows.
+    """
+    period_of = PARTITION_SCHEMES[get_scheme(connection)]
+    dated_rows = ((period_of(parser.parse(row[2]).date()), row) for row in rows)
+    if not presorted:
+        dated_rows = sorted(dated_rows, key=lambda dated_row: dated_row[0][0])
+    db_stem = os.path.splitext(os.path.basename(db_path))[0]
+    inserted = 0
+    for (key, period_start, period_end), group in groupby(
+        dated_rows, key=lambda dated_row: dated_row[0]
+    ):
+        connection.execute(
+            "insert or ignore into partitions (key, period_start, period_end, filename) values (?, ?, ?, ?);",
+            (
+                key,
+                period_start.isoformat(),
+                period_end.isoformat(),
+                f"{db_stem}.{key}.sqlite3",
+            ),
+        )
+        # An existing partition keeps the file it was created with, even if the main database was renamed since.
+        (filename,) = connection.execute(
+            "select filename from partitions where key = ?;", (key,)
+        ).fetchone()
+        connection.execute(
+            "update partitions set frozen = 0, summary = null, archive = null where key >= ? and frozen = 1;",
+            (key,),
+        )
+        schema = _attach(connection, db_path, key, filename)
+        connection.execute(PARTITION_SCHEMA.format(schema=schema))
+        cursor = connection.executemany(
+            f"insert into {schema}.events (type, amount, date_created) values (?, ?, ?)",
+            (row for _, row in group),
+        )
+        inserted += cursor.rowcount
+        _detach(connection, schema)
+    freeze_partitions(connection, db_path, interest_rate)
+    return inserted
+
+
+def freeze_partitions(
+    connection: sqlite3.Connection,
+    db_path: str,
+    interest_rate: Decimal = DEFAULT_INTEREST_RATE,
+) -> list[str]:
+    """Freeze every closed partition, i.e. every partition ending before the newest partition starts.
+
+    Partitions are frozen oldest first: each summary is the `Ledger` at the end of the partition, computed from the
+    previous summary and the partition's own events, so the frozen partitions are always a prefix of the history. The
+    summary only counts the repaid advances, so it does not grow with the history; the advances repaid during the
+    partition are kept apart in its `archive` column, so the full history can be listed without attaching any partition.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        db_path (str): The path of the main database.
+        interest_rate (Decimal, optional): The interest rate. Defaults to Decimal(0.00035).
+
+    Returns:
+        list[str]: The keys of the partitions that were frozen.
+    """
+    newest = connection.execute("select max(period_start) from partitions;").fetchone()
+    if newest[0] is None:
+        return []
+    previous = connection.execute(
+        "select summary from partitions where frozen = 1 order by period_end desc limit 1;"
+    ).fetchone()
+    if previous is None:
+        ledger = Ledger([], [], None, Decimal(0), Decimal(0), Decimal(0))
+    else:
+        ledger = _ledger_from_json(previous[0])
+    to_freeze = connection.execute(
+        "select key, period_end, filename from partitions where frozen = 0 and period_end < ? order by period_start;",
+        (newest[0],),
+    ).fetchall()
+    for key, period_end, filename in to_freeze:
+        schema = _attach(connection, db_path, key, filename)
+        events = connection.execute(
+            f"select * from {schema}.events order by date_created asc, id asc;"
+        )
+        ledger.archive = []
+        ledger = apply_events(
+            ledger, events, datetime.date.fromisoformat(period_end), interest_rate
+        )
+        events.close()
+        _detach(connection, schema)
+        archive, ledger.archive = ledger.archive, None
+        connection.execute(
+            "update partitions set frozen = 1, summary = ?, archive = ? where key = ?;",
+            (_ledger_to_json(ledger), _archive_to_json(archive), key),
+        )
+    connection.commit()
+    return [key for key, _, _ in to_freeze]
+
+
+def compute_partitioned_ledger(
+    connection: sqlite3.Connection,
+    db_path: str,
+    last_date: datetime.date,
+    interest_rate: Decimal = DEFAULT_INTEREST_RATE,
+    keep_history: bool = False,
+) -> Optional[Ledger]:
+    """Compute the ledger as of `last_date` from the partitioned events.
+
+    The newest frozen partition ending on or before `last_date` provides the starting state, so archived partitions are
+    never attached; only the partitions after it (and starting on or before `last_date`) are read.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        db_path (str): The path of the main database.
+        last_date (datetime.date): The last date to compute the interest.
+        interest_rate (Decimal, optional): The interest rate. Defaults to Decimal(0.00035).
+        keep_history (bool, optional): Keep the fully repaid advances in `archive`, reading the archives of the frozen
+            partitions. Defaults to False.
+
+    Returns:
+        Optional[Ledger]: The ledger, or None if there are no events.
+    """
+    if connection.execute("select 1 from partitions limit 1;").fetchone() is None:
+        return None
+    summary = connection.execute(
+        "select period_end, summary from partitions where frozen = 1 and period_end <= ? "
+        "order by period_end desc limit 1;",
+        (last_date.isoformat(),),
+    ).fetchone()
+    if summary is None:
+        ledger = Ledger([], [], None, Decimal(0), Decimal(0), Decimal(0))
+        if keep_history:
+            ledger.archive = []
+        pending = connection.execute(
+            "select key, filename from partitions where period_start <= ? order by period_start;",
+            (last_date.isoformat(),),
+        ).fetchall()
+    else:
+        ledger = _ledger_from_json(summary[1])
+        if keep_history:
+            ledger.archive = []
+            for (archive,) in connection.execute(
+                "select archive from partitions where frozen = 1 and period_end <= ? order by period_start;",
+                (summary[0],),
+            ):
+                ledger.archive.extend(_archive_from_json(archive))
+        pending = connection.execute(
+            "select key, filename from partitions where period_start > ? and period_start <= ? "
+            "order by period_start;",
+            (summary[0], last_date.isoformat()),
+        ).fetchall()
+    for key, filename in pending:
+        schema = _attach(connection, db_path, key, filename)
+        events = connection.execute(
+            f"select * from {schema}.events order by date_created asc, id asc;"
+        )
+        ledger = apply_events(ledger, events, last_date, interest_rate)
+        events.close()
+        _detach(connection, schema)
+    return compute_ledger([], last_date, interest_rate, ledger=ledger)
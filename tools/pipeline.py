@@ -0,0 +1,74 @@
+import queue
+import sqlite3
+import threading
+from typing import Iterator
+
+# Marks the end of the stream in the block queue.
+_DONE = object()
+
+
+def iter_events(
+    db_path: str,
+    query: str = "select * from events order by date_created asc;",
+    parameters: tuple = (),
+    block_size: int = 1000,
+    max_blocks: int = 8,
+) -> Iterator[tuple]:
+    """Yield the rows of `query` while a background thread keeps fetching the next blocks.
+
+    sqlite3 releases the GIL while it steps through the query, so reading the next block overlaps with whatever the
+    consumer does with the current one. At most `max_blocks` blocks wait in the queue: when the consumer falls behind,
+    the reader blocks instead of loading the whole table. Closing the iterator early (e.g. `compute_ledger` stopping at
+    its cutoff date) stops the reader and releases its connection.
+
+    Args:
+        db_path (str): The path of the database file; the reader opens its own connection.
+        query (str, optional): The query. Defaults to every event, in replay order.
+        parameters (tuple, optional): The query parameters. Defaults to ().
+        block_size (int, optional): The number of rows per `fetchmany` call. Defaults to 1000.
+        max_blocks (int, optional): The maximum number of blocks waiting to be consumed. Defaults to 8.
+
+    Yields:
+        tuple: The rows.
+    """
+    blocks = queue.Queue(maxsize=max_blocks)
+    stop = threading.Event()
+
+    def put(item: object) -> None:
+        # Wait for room in the queue, but give up as soon as the consumer is gone.
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.05)
+                return
+            except queue.Full:
+                continue
+
+    def read() -> None:
+        try:
+            connection = sqlite3.connect(db_path)
+            try:
+                cursor = connection.execute(query, parameters)
+                while not stop.is_set():
+                    block = cursor.fetchmany(block_size)
+                    if not block:
+                        break
+                    put(block)
+            finally:
+                connection.close()
+        except Exception as error:
+            put(error)
+        put(_DONE)
+
+    reader = threading.Thread(target=read, name="ledger-reader", daemon=True)
+    reader.start()
+    try:
+        while True:
+            block = blocks.get()
+            if block is _DONE:
+                return
+            if isinstance(block, Exception):
+                raise block
+            yield from block
+    finally:
+        stop.set()
+        reader.join()
@@ -0,0 +1,91 @@
+import datetime
+from dataclasses import replace
+from decimal import Decimal
+from typing import Iterable
+
+from tools.ledger import (
+    DEFAULT_INTEREST_RATE,
+    _parse_event_tuple,
+    _perform_advance,
+    _perform_payment,
+    _update_interest,
+)
+from tools.schemas import Ledger, ProjectionPoint
+
+
+def _point(
+    ledger: Ledger, day: datetime.date, interest_rate: Decimal
+) -> ProjectionPoint:
+    """Return the totals at the end of `day`, without changing the ledger.
+
+    Function complexity: O[1]
+    """
+    totals = replace(ledger)
+    # As we want to compute the interest for the last day, we add 1 day to the date.
+    totals = _update_interest(totals, day + datetime.timedelta(days=1), interest_rate)
+    return ProjectionPoint(
+        day,
+        totals.total_balance,
+        totals.total_accrued_interest,
+        totals.total_interest_paid,
+    )
+
+
+def project(
+    ledger: Ledger,
+    schedule: Iterable[tuple[int, str, float, str]],
+    dates: Iterable[datetime.date],
+    interest_rate: Decimal = DEFAULT_INTEREST_RATE,
+) -> list[ProjectionPoint]:
+    """Project the ledger forward under a schedule of future advances and payments.
+
+    The schedule is applied with the same functions as `compute_ledger`, and the interest between two schedule or
+    projection dates is accrued in a single O[1] step, so the cost does not depend on the length of the horizon. The
+    given ledger is left untouched and nothing is written to the database.
+
+    Function complexity: O[(s + d) log (s + d)] (where s is the number of scheduled events and d the number of dates).
+
+    Args:
+        ledger (Ledger): The current ledger, as returned by `compute_ledger`.
+        schedule (Iterable[tuple[int, str, float, str]]): The future events, in the same shape as the stored events.
+        dates (Iterable[datetime.date]): The dates to project the balances at (end of day).
+        interest_rate (Decimal, optional): The interest rate. Defaults to Decimal(0.00035).
+
+    Returns:
+        list[ProjectionPoint]: One point per date, in date order.
+
+    Raises:
+        ValueError: If a scheduled event is dated before the ledger's last update.
+    """
+    ledger = replace(
+        ledger,
+        advance_dates=list(ledger.advance_dates),
+        advances=list(ledger.advances),
+        archive=None,
+    )
+    events = sorted(
+        (_parse_event_tuple(event) for event in schedule),
+        key=lambda event: event.date_created,
+    )
+    if (
+        events
+        and ledger.last_balance_update_date is not None
+        and events[0].date_created < ledger.last_balance_update_date
+    ):
+        raise ValueError(
+            f"Scheduled events must start on or after {ledger.last_balance_update_date.isoformat()}"
+        )
+    points = []
+    event_index = 0
+    for day in sorted(dates):
+        # Events are applied before the balances of their own day are taken.
+        while event_index < len(events) and events[event_index].date_created <= day:
+            event = events[event_index]
+            ledger = _update_interest(ledger, event.date_created, interest_rate)
+            if event.event_type == "advance":
+                ledger = _perform_advance(ledger, event)
+            else:
+                ledger = _perform_payment(ledger, event.amount)
+            event_index += 1
+        points.append(_point(ledger, day, interest_rate))
+    return points
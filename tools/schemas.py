@@ -34,13 +34,22 @@ class Ledger:
     As we are interested in Advances and the interest, the total_balance is in the inverse state, i.e. if the balance is
     positive, the ledger represents a owned debit, if it is negative, it represents a credit.
 
+    Payments repay the advances oldest first, so the fully repaid advances are always a prefix of the history. They are
+    moved out of `advances` and only counted in `repaid_advances` and `repaid_total` (or kept in `archive`, when it is a
+    list), so the ledger grows with the outstanding advances rather than with the history.
+
     Attributes:
-        advance_dates (list[datetime.date]): The dates of the advances.
-        advances (list[Decimal]): The advances.
+        advance_dates (list[datetime.date]): The dates of the outstanding advances.
+        advances (list[Decimal]): The outstanding advances (the first one may be partially repaid).
         last_balance_update_date (Optional[datetime.date]): The date of the last balance update.
         total_accrued_interest (Decimal): The total accrued interest.
         total_interest_paid (Decimal): The total interest paid.
         total_balance (Decimal): The total balance.
+        repaid_advances (int): The number of fully repaid advances, i.e. the index of the first outstanding advance.
+        repaid_total (Decimal): The total of the fully repaid advances.
+        advances_total (Optional[Decimal]): The total of `advances`. Defaults to their sum.
+        archive (Optional[list[tuple[datetime.date, Decimal]]]): When a list, the date and amount of every fully repaid
+            advance are appended to it. Defaults to None (they are only counted).
     """
 
     advance_dates: list[datetime.date]
@@ -49,3 +58,134 @@ class Ledger:
     total_accrued_interest: Decimal
     total_interest_paid: Decimal
     total_balance: Decimal
+    repaid_advances: int = 0
+    repaid_total: Decimal = Decimal(0)
+    advances_total: Optional[Decimal] = None
+    archive: Optional[list[tuple[datetime.date, Decimal]]] = None
+
+    def __post_init__(self):
+        if self.advances_total is None:
+            self.advances_total = sum(self.advances, Decimal(0))
+
+
+@dataclass
+class JournalEntry:
+    """A dataclass to store the effect of a single event on the ledger.
+
+    Attributes:
+        event_id (int): The identifier of the event that produced the entry.
+        event_type (EventType): The event's type.
+        amount (Decimal): The event's amount.
+        date_created (datetime.date): The event's date.
+        interest_accrued (Decimal): The interest accrued between the previous event and this one.
+        interest_paid (Decimal): The part of a payment that went to accrued interest.
+        principal_paid (Decimal): The part of a payment that reduced the advance balance.
+        credit (Decimal): The part of a payment kept for future advances.
+        total_balance (Decimal): The total balance after the event.
+        total_accrued_interest (Decimal): The total accrued interest after the event.
+        total_interest_paid (Decimal): The total interest paid after the event.
+    """
+
+    event_id: int
+    event_type: EventType
+    amount: Decimal
+    date_created: datetime.date
+    interest_accrued: Decimal
+    interest_paid: Decimal
+    principal_paid: Decimal
+    credit: Decimal
+    total_balance: Decimal
+    total_accrued_interest: Decimal
+    total_interest_paid: Decimal
+
+
+@dataclass
+class Statement:
+    """A dataclass to store the activity of the ledger over a period.
+
+    Balances are taken at the end of the day, so the opening values are the closing values of the day before `start`.
+
+    Attributes:
+        start (datetime.date): The first day of the period.
+        end (datetime.date): The last day of the period (inclusive).
+        opening_balance (Decimal): The total balance at the start of the period.
+        opening_accrued_interest (Decimal): The interest payable at the start of the period.
+        closing_balance (Decimal): The total balance at the end of the period.
+        closing_accrued_interest (Decimal): The interest payable at the end of the period.
+        interest_accrued (Decimal): The interest accrued during the period.
+        interest_paid (Decimal): The interest paid during the period.
+        principal_paid (Decimal): The advance balance paid during the period.
+        entries (list[JournalEntry]): The journal entries of the period.
+    """
+
+    start: datetime.date
+    end: datetime.date
+    opening_balance: Decimal
+    opening_accrued_interest: Decimal
+    closing_balance: Decimal
+    closing_accrued_interest: Decimal
+    interest_accrued: Decimal
+    interest_paid: Decimal
+    principal_paid: Decimal
+    entries: list[JournalEntry]
+
+
+@dataclass
+class ProjectionPoint:
+    """A dataclass to store the projected state of the ledger at the end of a day.
+
+    Attributes:
+        date (datetime.date): The projected day.
+        total_balance (Decimal): The total balance (negative when it is a credit).
+        total_accrued_interest (Decimal): The interest payable.
+        total_interest_paid (Decimal): The total interest paid.
+    """
+
+    date: datetime.date
+    total_balance: Decimal
+    total_accrued_interest: Decimal
+    total_interest_paid: Decimal
+
+
+@dataclass
+class TraceRecord:
+    """A dataclass to store the effect of a single ledger operation, for auditing.
+
+    Attributes:
+        operation (str): The operation: "interest", "advance" or "payment".
+        event_id (Optional[int]): The identifier of the event being applied, if known.
+        date (Optional[datetime.date]): The date of the operation (for interest, the date it was accrued up to).
+        amount (Optional[Decimal]): The advance or payment amount.
+        balance_before (Decimal): The total balance before the operation.
+        balance_after (Decimal): The total balance after the operation.
+        accrued_interest_before (Decimal): The accrued interest before the operation.
+        accrued_interest_after (Decimal): The accrued interest after the operation.
+        interest_paid_before (Decimal): The total interest paid before the operation.
+        interest_paid_after (Decimal): The total interest paid after the operation.
+    """
+
+    operation: str
+    event_id: Optional[int]
+    date: Optional[datetime.date]
+    amount: Optional[Decimal]
+    balance_before: Decimal
+    balance_after: Decimal
+    accrued_interest_before: Decimal
+    accrued_interest_after: Decimal
+    interest_paid_before: Decimal
+    interest_paid_after: Decimal
+
+
+@dataclass
+class RejectedLine:
+    """A dataclass to store a line of a watched file that could not be ingested.
+
+    Attributes:
+        offset (int): The byte offset of the line in the file.
+        text (str): The line, without its newline.
+        reason (str): Why the line was rejected.
+    """
+
+    offset: int
+    text: str
+    reason: str
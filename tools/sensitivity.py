@@ -0,0 +1,60 @@
+import datetime
+from decimal import Decimal
+from typing import Iterable
+
+from tools.ledger import _operations, _parse_event_tuple, _update_interest
+from tools.schemas import Ledger
+
+
+def compute_sensitivity(
+    events: Iterable[tuple[int, str, float, str]],
+    last_date: datetime.date,
+    interest_rates: list[Decimal],
+) -> list[Ledger]:
+    """Compute the ledger under several interest rates in a single pass over the events.
+
+    Payments go to the accrued interest first, so the balances diverge from one rate to the next and every rate needs
+    its own state. What they share is reading and parsing the events, which dominates a replay: each event is parsed
+    once and then applied to every state with the same functions as `compute_ledger`, so every result matches
+    `compute_ledger(events, last_date, rate)` exactly.
+
+    Function complexity: O[n * r] (where n is the number of events and r the number of rates), with the parsing O[n].
+
+    Args:
+        events (Iterable[tuple[int, str, float, str]]): The events, ordered by date.
+        last_date (datetime.date): The last date to compute the interest.
+        interest_rates (list[Decimal]): The daily interest rates.
+
+    Returns:
+        list[Ledger]: One ledger per rate, in the order of `interest_rates`.
+    """
+    ledgers = [
+        Ledger([], [], None, Decimal(0), Decimal(0), Decimal(0)) for _ in interest_rates
+    ]
+    states = range(len(ledgers))
+    update_interest, perform_advance, perform_payment = _operations()
+    for event in events:
+        parsed_event = _parse_event_tuple(event)
+        if parsed_event.date_created > last_date:
+            break
+        is_advance = parsed_event.event_type == "advance"
+        for ix in states:
+            ledger = update_interest(
+                ledgers[ix],
+                parsed_event.date_created,
+                interest_rates[ix],
+                event=parsed_event,
+            )
+            if is_advance:
+                ledgers[ix] = perform_advance(ledger, parsed_event)
+            else:
+                ledgers[ix] = perform_payment(
+                    ledger, parsed_event.amount, event=parsed_event
+                )
+
+    # As we want to compute the interest for the last day, we add 1 day to the last date.
+    last_date = last_date + datetime.timedelta(days=1)
+    return [
+        _update_interest(ledger, last_date, interest_rate)
+        for ledger, interest_rate in zip(ledgers, interest_rates)
+    ]
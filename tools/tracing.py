@@ -0,0 +1,181 @@
+import datetime
+import functools
+import json
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Callable, Iterable, Iterator, Optional, TextIO
+
+from tools.schemas import Event, Ledger, TraceRecord
+
+# The registered tracers. The ledger functions only look at this list, so with no tracer the cost is one truthiness
+# check per call.
+_TRACERS: list["LedgerTracer"] = []
+
+
+class LedgerTracer(ABC):
+    """Receive a `TraceRecord` for every ledger operation that passes the filters.
+
+    Subclasses implement `write`. Records can be restricted to a date range and to some events, and sampled: the
+    sampling is decided per event identifier, so every operation of a sampled event is kept.
+
+    Args:
+        start (Optional[datetime.date], optional): The first date to trace. Defaults to no limit.
+        end (Optional[datetime.date], optional): The last date to trace. Defaults to no limit.
+        event_ids (Optional[Iterable[int]], optional): Only trace these events. Defaults to every event.
+        sample_rate (float, optional): The fraction of events to trace, between 0 and 1. Defaults to 1.
+    """
+
+    def __init__(
+        self,
+        start: Optional[datetime.date] = None,
+        end: Optional[datetime.date] = None,
+        event_ids: Optional[Iterable[int]] = None,
+        sample_rate: float = 1.0,
+    ):
+        self.start = start
+        self.end = end
+        self.event_ids = None if event_ids is None else frozenset(event_ids)
+        self.sample_rate = sample_rate
+
+    def accepts(self, record: TraceRecord) -> bool:
+        """Check the record against the date range, the event filter and the sampling."""
+        if record.date is not None:
+            if self.start is not None and record.date < self.start:
+                return False
+            if self.end is not None and record.date > self.end:
+                return False
+        if self.event_ids is not None and record.event_id not in self.event_ids:
+            return False
+        if self.sample_rate < 1 and record.event_id is not None:
+            # Multiplicative hashing spreads consecutive identifiers over [0, 1).
+            bucket = (record.event_id * 2654435761 % 2**32) / 2**32
+            return bucket < self.sample_rate
+        return True
+
+    @abstractmethod
+    def write(self, record: TraceRecord) -> None:
+        """Receive an accepted record."""
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlTracer(LedgerTracer):
+    """Write one JSON object per accepted record to a file.
+
+    Args:
+        outfile (TextIO): The file to write to.
+        **filters: The filters of `LedgerTracer`.
+    """
+
+    def __init__(self, outfile: TextIO, **filters):
+        super().__init__(**filters)
+        self.outfile = outfile
+
+    def write(self, record: TraceRecord) -> None:
+        self.outfile.write(
+            json.dumps(
+                {
+                    "operation": record.operation,
+                    "event_id": record.event_id,
+                    "date": None if record.date is None else record.date.isoformat(),
+                    "amount": None if record.amount is None else str(record.amount),
+                    "balance_before": str(record.balance_before),
+                    "balance_after": str(record.balance_after),
+                    "balance_delta": str(record.balance_after - record.balance_before),
+                    "accrued_interest_before": str(record.accrued_interest_before),
+                    "accrued_interest_after": str(record.accrued_interest_after),
+                    "accrued_interest_delta": str(
+                        record.accrued_interest_after - record.accrued_interest_before
+                    ),
+                    "interest_paid_before": str(record.interest_paid_before),
+                    "interest_paid_after": str(record.interest_paid_after),
+                    "interest_paid_delta": str(
+                        record.interest_paid_after - record.interest_paid_before
+                    ),
+                }
+            )
+            + "\n"
+        )
+
+    def close(self) -> None:
+        self.outfile.close()
+
+
+def register_tracer(tracer: LedgerTracer) -> None:
+    """Start sending ledger operations to `tracer`."""
+    _TRACERS.append(tracer)
+
+
+def unregister_tracer(tracer: LedgerTracer) -> None:
+    """Stop sending ledger operations to `tracer`."""
+    _TRACERS.remove(tracer)
+
+
+@contextmanager
+def tracing(tracer: LedgerTracer) -> Iterator[LedgerTracer]:
+    """Register `tracer` for the duration of the block."""
+    register_tracer(tracer)
+    try:
+        yield tracer
+    finally:
+        unregister_tracer(tracer)
+
+
+def _amount(argument: object) -> Optional[Decimal]:
+    return argument if isinstance(argument, Decimal) else None
+
+
+def traced(operation: str) -> Callable:
+    """Report the calls of a ledger operation to the registered tracers.
+
+    The decorated function takes the ledger first and, except for `advance` (whose second argument is the event), an
+    optional `event` keyword with the event being applied. With no tracer registered, the call goes straight through.
+
+    Args:
+        operation (str): The operation name in the trace records.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorate(function: Callable[..., Ledger]) -> Callable[..., Ledger]:
+        @functools.wraps(function)
+        def wrapper(ledger: Ledger, argument: object, *args, **kwargs) -> Ledger:
+            if not _TRACERS:
+                return function(ledger, argument, *args, **kwargs)
+            balance = ledger.total_balance
+            accrued = ledger.total_accrued_interest
+            paid = ledger.total_interest_paid
+            ledger = function(ledger, argument, *args, **kwargs)
+            event = kwargs.get("event")
+            if isinstance(argument, Event):
+                event = argument
+            if isinstance(argument, datetime.date):
+                date = argument
+            elif event is not None:
+                date = event.date_created
+            else:
+                # Called outside of `apply_events`: the interest was just brought up to the operation's date.
+                date = ledger.last_balance_update_date
+            record = TraceRecord(
+                operation,
+                None if event is None else event.identifier,
+                date,
+                event.amount if isinstance(argument, Event) else _amount(argument),
+                balance,
+                ledger.total_balance,
+                accrued,
+                ledger.total_accrued_interest,
+                paid,
+                ledger.total_interest_paid,
+            )
+            for tracer in _TRACERS:
+                if tracer.accepts(record):
+                    tracer.write(record)
+            return ledger
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,267 @@
+import csv
+import datetime
+import os
+import sqlite3
+from dataclasses import dataclass, replace
+from decimal import Decimal
+from typing import Optional
+
+from dateutil import parser
+
+from tools.ingest import insert_event_rows
+from tools.journal import append_journal, has_journal, rebuild_journal
+from tools.ledger import (
+    DEFAULT_INTEREST_RATE,
+    _update_interest,
+    apply_events,
+    compute_ledger,
+)
+from tools.schemas import EventType, JournalEntry, Ledger, RejectedLine
+
+OFFSETS_SCHEMA = """
+    create table if not exists ingest_offsets
+    (
+        filename text not null primary key,
+        offset integer not null
+    );
+"""
+
+
+@dataclass
+class WatchState:
+    """A dataclass to store the incremental state of a watched file.
+
+    Attributes:
+        filename (str): The absolute path of the watched file.
+        offset (int): The byte offset up to which the file was ingested.
+        ledger (Ledger): The ledger with every stored event applied (interest accrued up to the last event).
+        last_event_id (int): The identifier of the newest stored event.
+        last_event_date (Optional[datetime.date]): The date of the latest applied event.
+    """
+
+    filename: str
+    offset: int
+    ledger: Ledger
+    last_event_id: int
+    last_event_date: Optional[datetime.date]
+
+
+def _replay(
+    connection: sqlite3.Connection, interest_rate: Decimal
+) -> tuple[Ledger, Optional[datetime.date]]:
+    """Apply every stored event to an empty ledger.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        interest_rate (Decimal): The interest rate.
+
+    Returns:
+        tuple[Ledger, Optional[datetime.date]]: The ledger and the date of its latest event.
+    """
+    events = connection.execute(
+        "select * from events order by date_created asc;"
+    ).fetchall()
+    ledger = Ledger([], [], None, Decimal(0), Decimal(0), Decimal(0))
+    ledger = apply_events(ledger, events, datetime.date.max, interest_rate)
+    last_date = parser.parse(events[-1][-1]).date() if events else None
+    return ledger, last_date
+
+
+def open_watch(
+    connection: sqlite3.Connection,
+    filename: str,
+    interest_rate: Decimal = DEFAULT_INTEREST_RATE,
+) -> WatchState:
+    """Restore the state of a watched file: its persisted offset and the ledger of the stored events.
+
+    Function complexity: O[n] (where n is the number of stored events), only paid once per process.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        filename (str): The watched file.
+        interest_rate (Decimal, optional): The interest rate. Defaults to Decimal(0.00035).
+
+    Returns:
+        WatchState: The state to pass to `ingest_batch`.
+    """
+    connection.execute(OFFSETS_SCHEMA)
+    connection.commit()
+    filename = os.path.abspath(filename)
+    row = connection.execute(
+        "select offset from ingest_offsets where filename = ?;", (filename,)
+    ).fetchone()
+    last_event_id = connection.execute("select max(id) from events;").fetchone()[0]
+    ledger, last_event_date = _replay(connection, interest_rate)
+    return WatchState(
+        filename,
+        0 if row is None else row[0],
+        ledger,
+        last_event_id or 0,
+        last_event_date,
+    )
+
+
+def _read_lines(filename: str, offset: int, max_rows: int) -> tuple[list[bytes], int]:
+    """Read up to `max_rows` complete lines starting at `offset`.
+
+    A trailing line without its newline is still being written, so it is left for the next read.
+
+    Args:
+        filename (str): The file to read.
+        offset (int): The byte offset to start from.
+        max_rows (int): The maximum number of lines to read.
+
+    Returns:
+        tuple[list[bytes], int]: The lines and the offset right after the last one.
+    """
+    lines = []
+    with open(filename, "rb") as infile:
+        infile.seek(offset)
+        while len(lines) < max_rows:
+            line = infile.readline()
+            if not line.endswith(b"\n"):
+                break
+            lines.append(line)
+            offset += len(line)
+    return lines, offset
+
+
+def _parse_line(line: bytes) -> Optional[tuple[str, str, str]]:
+    """Parse a csv line into a `(type, amount, date_created)` row, or None for a blank line.
+
+    Args:
+        line (bytes): The line.
+
+    Returns:
+        Optional[tuple[str, str, str]]: The row.
+
+    Raises:
+        ValueError: If the line is not a valid event.
+    """
+    row = next(csv.reader([line.decode()]), [])
+    if not row:
+        return None
+    if len(row) != 3:
+        raise ValueError(f"expected 3 fields, got {len(row)}")
+    event_type, date_created, amount = row
+    if event_type not in {event.value for event in EventType}:
+        raise ValueError(f"unknown event type {event_type!r}")
+    try:
+        # Stored dates are compared as text, so they must be ISO dates.
+        parser.isoparse(date_created)
+    except ValueError:
+        raise ValueError(f"invalid date {date_created!r}") from None
+    try:
+        valid_amount = Decimal(amount).is_finite()
+    except ArithmeticError:
+        valid_amount = False
+    if not valid_amount:
+        raise ValueError(f"invalid amount {amount!r}")
+    return event_type, amount, date_created
+
+
+def ingest_batch(
+    connection: sqlite3.Connection,
+    state: WatchState,
+    max_rows: int = 1000,
+    interest_rate: Decimal = DEFAULT_INTEREST_RATE,
+    rejected: Optional[list[RejectedLine]] = None,
+) -> int:
+    """Insert the rows appended to the watched file since the last batch and advance the ledger.
+
+    The rows and the new offset are committed in the same transaction, so after a restart no byte is ingested twice.
+    Rows dated on or after the latest applied event are applied incrementally; an older row forces a replay of the
+    stored events. Malformed lines are skipped (the offset still moves past them), so they can not stall the watch.
+
+    Function complexity: O[k] (where k is the number of new rows), O[n] when rows arrive out of order.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        state (WatchState): The state returned by `open_watch`, updated in place.
+        max_rows (int, optional): The maximum number of rows per batch. Defaults to 1000.
+        interest_rate (Decimal, optional): The interest rate. Defaults to Decimal(0.00035).
+        rejected (Optional[list[RejectedLine]], optional): When given, the skipped malformed lines are appended to it.
+
+    Returns:
+        int: The number of ingested rows.
+    """
+    lines, offset = _read_lines(state.filename, state.offset, max_rows)
+    if not lines:
+        return 0
+    rows = []
+    line_offset = state.offset
+    for line in lines:
+        try:
+            row = _parse_line(line)
+        except ValueError as error:
+            if rejected is not None:
+                text = line.decode(errors="replace").rstrip("\r\n")
+                rejected.append(RejectedLine(line_offset, text, str(error)))
+            row = None
+        if row is not None:  # Blank lines carry no event.
+            rows.append(row)
+        line_offset += len(line)
+    insert_event_rows(connection, rows)
+    connection.execute(
+        "insert or replace into ingest_offsets (filename, offset) values (?, ?);",
+        (state.filename, offset),
+    )
+    # Read the rows back so the amounts are the values every other replay sees.
+    events = connection.execute(
+        "select * from events where id > ? order by date_created asc, id asc;",
+        (state.last_event_id,),
+    ).fetchall()
+    journal = has_journal(connection)
+    if events:
+        first_date = parser.parse(events[0][-1]).date()
+        if state.last_event_date is not None and first_date < state.last_event_date:
+            state.ledger, state.last_event_date = _replay(connection, interest_rate)
+            if journal:
+                rebuild_journal(connection, interest_rate)
+        else:
+            entries: Optional[list[JournalEntry]] = [] if journal else None
+            state.ledger = apply_events(
+                state.ledger, events, datetime.date.max, interest_rate, entries
+            )
+            state.last_event_date = parser.parse(events[-1][-1]).date()
+            if journal:
+                append_journal(connection, entries)
+        state.last_event_id = max(event[0] for event in events)
+    connection.commit()
+    state.offset = offset
+    return len(rows)
+
+
+def ledger_as_of(
+    connection: sqlite3.Connection,
+    state: WatchState,
+    last_date: datetime.date,
+    interest_rate: Decimal = DEFAULT_INTEREST_RATE,
+) -> Ledger:
+    """Return the watched ledger with interest accrued up to the end of `last_date`, leaving the state untouched.
+
+    The state has every stored event applied, so a `last_date` before the latest event is computed by replaying the
+    stored events up to it instead.
+
+    Function complexity: O[1], O[n] when `last_date` is before the latest event.
+
+    Args:
+        connection (sqlite3.Connection): The database connection.
+        state (WatchState): The watch state.
+        last_date (datetime.date): The last date to compute the interest.
+        interest_rate (Decimal, optional): The interest rate. Defaults to Decimal(0.00035).
+
+    Returns:
+        Ledger: The ledger.
+    """
+    if state.last_event_date is not None and last_date < state.last_event_date:
+        events = connection.execute(
+            "select * from events where date_created <= ? order by date_created asc;",
+            (last_date.isoformat(),),
+        ).fetchall()
+        return compute_ledger(events, last_date, interest_rate)
+    ledger = replace(state.ledger)
+    # As we want to compute the interest for the last day, we add 1 day to the last date.
+    return _update_interest(
+        ledger, last_date + datetime.timedelta(days=1), interest_rate
+    )